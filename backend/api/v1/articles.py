@@ -1,76 +1,27 @@
-from collections import Counter
-from datetime import date, datetime, timedelta
+from datetime import datetime
 from typing import Annotated, Optional
 
 from jkit.article import Article
 from jkit.constants import ARTICLE_SLUG_REGEX
 from jkit.exceptions import ResourceUnavailableError
-from litestar import Response, Router, get
+from jkit.identifier_check import is_user_slug
+from litestar import Response, Router, get, post
 from litestar.openapi.spec.example import Example
 from litestar.params import Parameter
-from litestar.status_codes import HTTP_400_BAD_REQUEST
-from msgspec import Struct, field
+from litestar.status_codes import HTTP_200_OK, HTTP_400_BAD_REQUEST
+from msgspec import Meta, Struct, field
 from sshared.time import to_datetime
-from sshared.word_split import WordSplitter
 from sspeedup.api.code import Code
 from sspeedup.api.litestar import (
+    REQUEST_STRUCT_CONFIG,
     RESPONSE_STRUCT_CONFIG,
     fail,
     generate_response_spec,
     success,
 )
 
-from models.jianshu.article_earning_ranking_record import (
-    ArticleEarningRankingRecord,
-)
-from utils.config import CONFIG
-
-splitter = WordSplitter(
-    access_key_id=CONFIG.word_split_access_key.access_key_id,
-    access_key_secret=CONFIG.word_split_access_key.access_key_secret,
-)
-
-
-async def get_earliest_can_recommend_date(author_slug: str) -> Optional[date]:
-    counted_article_slugs = set()
-
-    latest_onrank_record = await ArticleEarningRankingRecord.get_latest_record(
-        author_slug=author_slug, minimum_ranking=85
-    )
-    if not latest_onrank_record:
-        return None
-
-    interval_days = 10 if latest_onrank_record.ranking <= 30 else 7
-    counted_article_slugs.add(latest_onrank_record.slug)
-
-    now_record = latest_onrank_record
-    while True:
-        pervious_record = await ArticleEarningRankingRecord.get_pervious_record(
-            base_record=now_record, minimum_ranking=85
-        )
-        if not pervious_record:
-            return latest_onrank_record.date + timedelta(days=interval_days)
-        if pervious_record.slug in counted_article_slugs:
-            now_record = pervious_record
-            continue
-
-        counted_article_slugs.add(pervious_record.slug)
-
-        if (
-            now_record.ranking <= 30
-            and (now_record.date - pervious_record.date).days + 1 >= 10
-        ) or (
-            now_record.ranking > 30
-            and (now_record.date - pervious_record.date).days + 1 >= 7
-        ):
-            return latest_onrank_record.date + timedelta(days=interval_days)
-
-        if pervious_record.ranking <= 30:
-            interval_days += 10
-        else:
-            interval_days += 7
-
-        now_record = pervious_record
+from utils.lp_recommend import LP_RECOMMEND_ELIGIBILITY_INDEX
+from utils.word_freq import get_word_freq
 
 
 class GetWordFreqResponse(Struct, **RESPONSE_STRUCT_CONFIG):
@@ -121,7 +72,7 @@ async def get_word_freq_handler(
     title = article_info.title
     text = article_info.text_content
 
-    word_freq = dict(Counter(await splitter.split(text)).most_common(100))
+    word_freq = await get_word_freq(article_slug, text)
 
     return success(
         data=GetWordFreqResponse(
@@ -182,7 +133,9 @@ async def get_LP_recommend_check_handler(  # noqa: N802
     author_slug = article_info.author_info.to_user_obj().slug
     article_title = article_info.title
     article_fp_reward = article_info.earned_fp_amount
-    article_next_can_recommend_date = await get_earliest_can_recommend_date(author_slug)
+    article_next_can_recommend_date = await LP_RECOMMEND_ELIGIBILITY_INDEX.get(
+        author_slug
+    )
 
     can_recommend_now = article_fp_reward < 35 and (
         not article_next_can_recommend_date
@@ -201,11 +154,77 @@ async def get_LP_recommend_check_handler(  # noqa: N802
     )
 
 
+# 批量查询 LP 推荐资格时单次最多支持的作者数量
+LP_RECOMMEND_ELIGIBILITY_MAX_AUTHORS = 200
+
+
+class PostLPRecommendEligibilityRequest(Struct, **REQUEST_STRUCT_CONFIG):
+    author_slugs: Annotated[
+        list[str], Meta(min_length=1, max_length=LP_RECOMMEND_ELIGIBILITY_MAX_AUTHORS)
+    ]
+
+
+class PostLPRecommendEligibilityItem(Struct, **RESPONSE_STRUCT_CONFIG):
+    author_slug: str
+    # 仅根据作者上榜记录判断，不包含文章获钻量条件
+    can_recommend_now: bool
+    next_can_recommend_date: Optional[datetime]
+
+
+class PostLPRecommendEligibilityResponse(Struct, **RESPONSE_STRUCT_CONFIG):
+    authors: list[PostLPRecommendEligibilityItem]
+
+
+@post(
+    "/lp-recommend-eligibility",
+    summary="批量获取作者 LP 理事会推文资格",
+    status_code=HTTP_200_OK,
+    responses={
+        200: generate_response_spec(PostLPRecommendEligibilityResponse),
+        400: generate_response_spec(),
+    },
+)
+async def post_LP_recommend_eligibility_handler(  # noqa: N802
+    data: PostLPRecommendEligibilityRequest,
+) -> Response:
+    author_slugs = list(dict.fromkeys(data.author_slugs))
+    if not all(is_user_slug(x) for x in author_slugs):
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="用户 Slug 无效",
+        )
+
+    next_can_recommend_dates = await LP_RECOMMEND_ELIGIBILITY_INDEX.get_many(
+        author_slugs
+    )
+    today = datetime.now().date()
+
+    return success(
+        data=PostLPRecommendEligibilityResponse(
+            authors=[
+                PostLPRecommendEligibilityItem(
+                    author_slug=author_slug,
+                    can_recommend_now=not next_can_recommend_date
+                    or next_can_recommend_date <= today,
+                    next_can_recommend_date=to_datetime(next_can_recommend_date)
+                    if next_can_recommend_date
+                    else None,
+                )
+                for author_slug, next_can_recommend_date in (
+                    next_can_recommend_dates.items()
+                )
+            ]
+        )
+    )
+
+
 ARTICLES_ROUTER = Router(
     path="/articles",
     route_handlers=[
         get_word_freq_handler,
         get_LP_recommend_check_handler,
+        post_LP_recommend_eligibility_handler,
     ],
     tags=["文章"],
 )
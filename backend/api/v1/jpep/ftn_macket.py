@@ -1,27 +1,64 @@
-from asyncio import gather
-from datetime import datetime
+from collections.abc import AsyncGenerator
+from datetime import datetime, timedelta
+from itertools import islice
 from typing import Annotated, Literal, Optional
 
 from jkit.jpep.platform_settings import PlatformSettings
-from litestar import Response, Router, get
+from litestar import Request, Response, Router, get
 from litestar.params import Parameter
+from litestar.response import ServerSentEvent, ServerSentEventMessage, Stream
+from litestar.status_codes import HTTP_400_BAD_REQUEST
 from msgspec import Struct, field
+from msgspec.json import encode as json_encode
 from sshared.time import get_datetime_before_now, parse_td_str
+from sspeedup.api.code import Code
 from sspeedup.api.litestar import (
     RESPONSE_STRUCT_CONFIG,
+    fail,
     generate_response_spec,
     success,
 )
 
-from models.jpep.ftn_macket_record import FTNMacketRecord
+from utils.cache import StaleWhileRevalidateCache
+from utils.config import CONFIG
+from utils.downsample import lttb_downsample
+from utils.ftn_macket_export import (
+    EXPORT_MEDIA_TYPES,
+    ExportFormat,
+    export_ftn_macket_history,
+    is_arrow_available,
+)
+from utils.ftn_macket_history import FTN_MACKET_HISTORY_CACHE
+from utils.ftn_macket_order_book import (
+    FTN_MACKET_ORDER_BOOK_CACHE,
+    FTNMacketOrderBookSide,
+)
+from utils.ftn_macket_rollup import sync_ftn_macket_rollups
+from utils.ftn_macket_snapshot import (
+    EMPTY_SNAPSHOT_SIDE,
+    FTN_MACKET_SNAPSHOT_CACHE,
+)
+from utils.ftn_macket_stream import FTN_MACKET_SNAPSHOT_BROADCASTER
+from utils.sse import HEARTBEAT_MESSAGE
+from utils.time_series import (
+    ColumnarHistoryResponse,
+    ColumnarSeries,
+    SeriesFormat,
+    generate_series_response_spec,
+    negotiated_success,
+    to_columnar,
+    to_data_time,
+)
 
-RESOLUTION_MAPPING: dict[str, Literal["max", "hour", "day"]] = {
-    "5m": "max",  # TODO
-    "1h": "hour",
-    "1d": "day",
+RESOLUTION_MAPPING: dict[str, timedelta] = {
+    "5m": timedelta(minutes=5),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
 }
 
-PLATFORM_SETTINGS = PlatformSettings()
+PLATFORM_SETTINGS_CACHE = StaleWhileRevalidateCache(
+    PlatformSettings().get_data, ttl=CONFIG.cache.platform_settings_ttl
+)
 
 
 class GetRulesResponse(Struct, **RESPONSE_STRUCT_CONFIG):
@@ -40,7 +77,7 @@ class GetRulesResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     },
 )
 async def get_rules_handler() -> Response:
-    settings = await PLATFORM_SETTINGS.get_data()
+    settings = await PLATFORM_SETTINGS_CACHE.get()
 
     return success(
         data=GetRulesResponse(
@@ -67,15 +104,12 @@ class GetCurrentPriceResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     },
 )
 async def get_current_price_handler() -> Response:
-    buy_price, sell_price = await gather(
-        FTNMacketRecord.get_current_price("BUY"),
-        FTNMacketRecord.get_current_price("SELL"),
-    )
+    snapshot = await FTN_MACKET_SNAPSHOT_CACHE.get()
 
     return success(
         data=GetCurrentPriceResponse(
-            buy_price=buy_price,
-            sell_price=sell_price,
+            buy_price=snapshot.buy.price if snapshot else None,
+            sell_price=snapshot.sell.price if snapshot else None,
         )
     )
 
@@ -93,15 +127,12 @@ class GetCurrentAmountResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     },
 )
 async def get_current_amount_handler() -> Response:
-    buy_amount, sell_amount = await gather(
-        FTNMacketRecord.get_current_amount("BUY"),
-        FTNMacketRecord.get_current_amount("SELL"),
-    )
+    snapshot = await FTN_MACKET_SNAPSHOT_CACHE.get()
 
     return success(
         data=GetCurrentAmountResponse(
-            buy_amount=buy_amount,
-            sell_amount=sell_amount,
+            buy_amount=snapshot.buy.amount if snapshot else None,
+            sell_amount=snapshot.sell.amount if snapshot else None,
         )
     )
 
@@ -114,10 +145,13 @@ class GetPriceHistoryResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     "/price-history",
     summary="获取历史价格",
     responses={
-        200: generate_response_spec(GetPriceHistoryResponse),
+        200: generate_series_response_spec(
+            GetPriceHistoryResponse, ColumnarHistoryResponse
+        ),
     },
 )
 async def get_price_history_handler(
+    request: Request,
     type_: Annotated[
         Literal["buy", "sell"], Parameter(description="交易单类型", query="type")
     ],
@@ -125,18 +159,26 @@ async def get_price_history_handler(
         Literal["24h", "7d", "15d", "30d"], Parameter(description="时间范围")
     ],
     resolution: Annotated[Literal["5m", "1h", "1d"], Parameter(description="统计粒度")],
+    max_points: Annotated[
+        Optional[int], Parameter(description="最大数据点数量", ge=3, le=5000)
+    ] = None,
+    format_: Annotated[
+        SeriesFormat, Parameter(description="时间序列格式", query="format")
+    ] = "map",
 ) -> Response:
-    history = await FTNMacketRecord.get_price_history(
+    history = await FTN_MACKET_HISTORY_CACHE.get_price_history(
         type=type_.upper(),  # type: ignore
         start_time=get_datetime_before_now(parse_td_str(range)),
         resolution=RESOLUTION_MAPPING[resolution],
     )
 
-    return success(
-        data=GetPriceHistoryResponse(
-            history=history,
+    history = lttb_downsample(history, max_points)
+    if format_ == "columnar":
+        return negotiated_success(
+            request, ColumnarHistoryResponse(history=to_columnar(history))
         )
-    )
+
+    return negotiated_success(request, GetPriceHistoryResponse(history=history))
 
 
 class GetAmountHistoryResponse(Struct, **RESPONSE_STRUCT_CONFIG):
@@ -147,10 +189,13 @@ class GetAmountHistoryResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     "/amount-history",
     summary="获取历史挂单量",
     responses={
-        200: generate_response_spec(GetAmountHistoryResponse),
+        200: generate_series_response_spec(
+            GetAmountHistoryResponse, ColumnarHistoryResponse
+        ),
     },
 )
 async def get_amount_history_handler(
+    request: Request,
     type_: Annotated[
         Literal["buy", "sell"], Parameter(description="交易单类型", query="type")
     ],
@@ -158,18 +203,26 @@ async def get_amount_history_handler(
         Literal["24h", "7d", "15d", "30d"], Parameter(description="时间范围")
     ],
     resolution: Annotated[Literal["5m", "1h", "1d"], Parameter(description="统计粒度")],
+    max_points: Annotated[
+        Optional[int], Parameter(description="最大数据点数量", ge=3, le=5000)
+    ] = None,
+    format_: Annotated[
+        SeriesFormat, Parameter(description="时间序列格式", query="format")
+    ] = "map",
 ) -> Response:
-    history = await FTNMacketRecord.get_amount_history(
+    history = await FTN_MACKET_HISTORY_CACHE.get_amount_history(
         type=type_.upper(),  # type: ignore
         start_time=get_datetime_before_now(parse_td_str(range)),
         resolution=RESOLUTION_MAPPING[resolution],
     )
 
-    return success(
-        data=GetAmountHistoryResponse(
-            history=history,
+    history = lttb_downsample(history, max_points)
+    if format_ == "columnar":
+        return negotiated_success(
+            request, ColumnarHistoryResponse(history=to_columnar(history))
         )
-    )
+
+    return negotiated_success(request, GetAmountHistoryResponse(history=history))
 
 
 class GetCurrentAmountDistributionResponse(Struct, **RESPONSE_STRUCT_CONFIG):
@@ -189,9 +242,17 @@ async def get_current_amount_distribution_handler(
     ],
     limit: Annotated[int, Parameter(description="结果数量", gt=0, le=100)] = 10,
 ) -> Response:
-    amount_distribution = await FTNMacketRecord.get_current_amount_distribution(
-        type=type_.upper(),  # type: ignore
-        limit=limit,
+    snapshot = await FTN_MACKET_SNAPSHOT_CACHE.get()
+    if not snapshot:  # 数据库中没有数据
+        return success(
+            data=GetCurrentAmountDistributionResponse(amount_distribution={})
+        )
+
+    amount_distribution = dict(
+        islice(
+            snapshot.get_side(type_.upper()).amount_distribution.items(),  # type: ignore
+            limit,
+        )
     )
 
     return success(
@@ -201,6 +262,286 @@ async def get_current_amount_distribution_handler(
     )
 
 
+class _GetDashboardResponseBase(Struct, **RESPONSE_STRUCT_CONFIG):
+    buy_price: Optional[float]
+    sell_price: Optional[float]
+    buy_amount: Optional[int]
+    sell_amount: Optional[int]
+    buy_amount_distribution: dict[float, int]
+    sell_amount_distribution: dict[float, int]
+
+
+class GetDashboardResponse(_GetDashboardResponseBase, **RESPONSE_STRUCT_CONFIG):
+    buy_price_history: dict[datetime, float]
+    sell_price_history: dict[datetime, float]
+    buy_amount_history: dict[datetime, int]
+    sell_amount_history: dict[datetime, int]
+
+
+class GetDashboardColumnarResponse(_GetDashboardResponseBase, **RESPONSE_STRUCT_CONFIG):
+    buy_price_history: ColumnarSeries
+    sell_price_history: ColumnarSeries
+    buy_amount_history: ColumnarSeries
+    sell_amount_history: ColumnarSeries
+
+
+@get(
+    "/dashboard",
+    summary="获取贝市看板数据",
+    responses={
+        200: generate_series_response_spec(
+            GetDashboardResponse, GetDashboardColumnarResponse
+        ),
+    },
+)
+async def get_dashboard_handler(
+    request: Request,
+    range: Annotated[  # noqa: A002
+        Literal["24h", "7d", "15d", "30d"], Parameter(description="时间范围")
+    ],
+    resolution: Annotated[Literal["5m", "1h", "1d"], Parameter(description="统计粒度")],
+    max_points: Annotated[
+        Optional[int], Parameter(description="最大数据点数量", ge=3, le=5000)
+    ] = None,
+    format_: Annotated[
+        SeriesFormat, Parameter(description="时间序列格式", query="format")
+    ] = "map",
+    distribution_limit: Annotated[
+        int, Parameter(description="挂单分布结果数量", gt=0, le=100)
+    ] = 10,
+) -> Response:
+    history = await FTN_MACKET_HISTORY_CACHE.get_history(
+        start_time=get_datetime_before_now(parse_td_str(range)),
+        resolution=RESOLUTION_MAPPING[resolution],
+    )
+
+    snapshot = await FTN_MACKET_SNAPSHOT_CACHE.get()
+    buy = snapshot.buy if snapshot else EMPTY_SNAPSHOT_SIDE
+    sell = snapshot.sell if snapshot else EMPTY_SNAPSHOT_SIDE
+    buy_amount_distribution = dict(
+        islice(buy.amount_distribution.items(), distribution_limit)
+    )
+    sell_amount_distribution = dict(
+        islice(sell.amount_distribution.items(), distribution_limit)
+    )
+    buy_price_history = lttb_downsample(history["BUY"][0], max_points)
+    sell_price_history = lttb_downsample(history["SELL"][0], max_points)
+    buy_amount_history = lttb_downsample(history["BUY"][1], max_points)
+    sell_amount_history = lttb_downsample(history["SELL"][1], max_points)
+
+    if format_ == "columnar":
+        return negotiated_success(
+            request,
+            GetDashboardColumnarResponse(
+                buy_price=buy.price,
+                sell_price=sell.price,
+                buy_amount=buy.amount,
+                sell_amount=sell.amount,
+                buy_amount_distribution=buy_amount_distribution,
+                sell_amount_distribution=sell_amount_distribution,
+                buy_price_history=to_columnar(buy_price_history),
+                sell_price_history=to_columnar(sell_price_history),
+                buy_amount_history=to_columnar(buy_amount_history),
+                sell_amount_history=to_columnar(sell_amount_history),
+            ),
+        )
+
+    return negotiated_success(
+        request,
+        GetDashboardResponse(
+            buy_price=buy.price,
+            sell_price=sell.price,
+            buy_amount=buy.amount,
+            sell_amount=sell.amount,
+            buy_amount_distribution=buy_amount_distribution,
+            sell_amount_distribution=sell_amount_distribution,
+            buy_price_history=buy_price_history,
+            sell_price_history=sell_price_history,
+            buy_amount_history=buy_amount_history,
+            sell_amount_history=sell_amount_history,
+        ),
+    )
+
+
+class OrderBookDepthCurve(Struct, **RESPONSE_STRUCT_CONFIG):
+    # 从最优价格开始排列
+    prices: list[float]
+    cumulative_amounts: list[int]
+
+
+class OrderBookSideAnalytics(Struct, **RESPONSE_STRUCT_CONFIG):
+    price: Optional[float]
+    amount: int
+    depth: OrderBookDepthCurve
+    vwap: Optional[float]
+    slippage: Optional[float]
+
+
+class GetOrderBookAnalyticsResponse(Struct, **RESPONSE_STRUCT_CONFIG):
+    fetch_time: Optional[datetime]
+    spread: Optional[float]
+    mid_price: Optional[float]
+    buy: OrderBookSideAnalytics
+    sell: OrderBookSideAnalytics
+
+
+def _get_order_book_side_analytics(
+    side: FTNMacketOrderBookSide, quantity: Optional[int], depth_limit: int
+) -> OrderBookSideAnalytics:
+    return OrderBookSideAnalytics(
+        price=side.best_price,
+        amount=side.total_amount,
+        depth=OrderBookDepthCurve(
+            prices=side.prices[:depth_limit].tolist(),
+            cumulative_amounts=side.cumulative_amounts[:depth_limit].tolist(),
+        ),
+        vwap=side.get_vwap(quantity) if quantity else None,
+        slippage=side.get_slippage(quantity) if quantity else None,
+    )
+
+
+@get(
+    "/order-book-analytics",
+    summary="获取当前挂单簿分析数据",
+    responses={
+        200: generate_response_spec(GetOrderBookAnalyticsResponse),
+    },
+)
+async def get_order_book_analytics_handler(
+    quantity: Annotated[
+        Optional[int], Parameter(description="计算成交均价的简书贝数量", gt=0)
+    ] = None,
+    depth_limit: Annotated[
+        int, Parameter(description="深度曲线价格档位数量", gt=0, le=1000)
+    ] = 100,
+) -> Response:
+    snapshot = await FTN_MACKET_SNAPSHOT_CACHE.get()
+    if not snapshot:  # 数据库中没有数据
+        empty_side = OrderBookSideAnalytics(
+            price=None,
+            amount=0,
+            depth=OrderBookDepthCurve(prices=[], cumulative_amounts=[]),
+            vwap=None,
+            slippage=None,
+        )
+        return success(
+            data=GetOrderBookAnalyticsResponse(
+                fetch_time=None,
+                spread=None,
+                mid_price=None,
+                buy=empty_side,
+                sell=empty_side,
+            )
+        )
+
+    order_book = FTN_MACKET_ORDER_BOOK_CACHE.get(snapshot)
+
+    return success(
+        data=GetOrderBookAnalyticsResponse(
+            fetch_time=order_book.fetch_time,
+            spread=order_book.spread,
+            mid_price=order_book.mid_price,
+            buy=_get_order_book_side_analytics(order_book.buy, quantity, depth_limit),
+            sell=_get_order_book_side_analytics(order_book.sell, quantity, depth_limit),
+        )
+    )
+
+
+@get(
+    "/export",
+    summary="导出历史数据",
+)
+async def get_export_handler(
+    start_time: Annotated[datetime, Parameter(description="开始时间", query="start")],
+    end_time: Annotated[datetime, Parameter(description="结束时间", query="end")],
+    resolution: Annotated[Literal["5m", "1h", "1d"], Parameter(description="统计粒度")],
+    format_: Annotated[
+        ExportFormat, Parameter(description="导出格式", query="format")
+    ] = "csv",
+) -> Response:
+    # 数据库中的时间不带时区，不带时区的时间视为北京时间
+    start_time = to_data_time(start_time)
+    end_time = to_data_time(end_time)
+    if end_time <= start_time:
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="结束时间必须晚于开始时间",
+        )
+    if format_ == "arrow" and not is_arrow_available():
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="服务端未安装 Arrow 支持，请使用其它导出格式",
+        )
+
+    await sync_ftn_macket_rollups()
+
+    return Stream(
+        export_ftn_macket_history(
+            format=format_,
+            resolution=RESOLUTION_MAPPING[resolution],
+            start_time=start_time,
+            end_time=end_time,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[format_],
+        headers={
+            "Content-Disposition": "attachment; "
+            f'filename="ftn-macket-history-{resolution}.{format_}"'
+        },
+    )
+
+
+class FTNMacketStreamEvent(Struct, **RESPONSE_STRUCT_CONFIG):
+    fetch_time: datetime
+    buy_price: Optional[float]
+    sell_price: Optional[float]
+    buy_amount: Optional[int]
+    sell_amount: Optional[int]
+    buy_amount_distribution: dict[float, int]
+    sell_amount_distribution: dict[float, int]
+
+
+async def _iter_stream_events(
+    distribution_limit: int,
+) -> AsyncGenerator[ServerSentEventMessage]:
+    async for snapshot in FTN_MACKET_SNAPSHOT_BROADCASTER.subscribe():
+        if not snapshot:  # 心跳
+            yield HEARTBEAT_MESSAGE
+            continue
+
+        event = FTNMacketStreamEvent(
+            fetch_time=snapshot.fetch_time,
+            buy_price=snapshot.buy.price,
+            sell_price=snapshot.sell.price,
+            buy_amount=snapshot.buy.amount,
+            sell_amount=snapshot.sell.amount,
+            buy_amount_distribution=dict(
+                islice(snapshot.buy.amount_distribution.items(), distribution_limit)
+            ),
+            sell_amount_distribution=dict(
+                islice(snapshot.sell.amount_distribution.items(), distribution_limit)
+            ),
+        )
+        yield ServerSentEventMessage(
+            data=json_encode(event).decode(),
+            event="snapshot",
+            id=snapshot.fetch_time.isoformat(),
+        )
+
+
+@get(
+    "/stream",
+    summary="订阅贝市快照更新",
+)
+async def get_stream_handler(
+    distribution_limit: Annotated[
+        int, Parameter(description="挂单分布结果数量", gt=0, le=100)
+    ] = 10,
+) -> ServerSentEvent:
+    return ServerSentEvent(_iter_stream_events(distribution_limit))
+
+
 FTN_MACKET_ROUTER = Router(
     path="/ftn-macket",
     route_handlers=[
@@ -210,6 +551,10 @@ FTN_MACKET_ROUTER = Router(
         get_price_history_handler,
         get_amount_history_handler,
         get_current_amount_distribution_handler,
+        get_dashboard_handler,
+        get_order_book_analytics_handler,
+        get_export_handler,
+        get_stream_handler,
     ],
     tags=["简书积分兑换平台 - 贝市"],
 )
@@ -2,10 +2,11 @@ from asyncio import gather
 from datetime import datetime, timedelta
 from typing import Annotated, Literal, Optional
 
+from jkit.constants import USER_SLUG_REGEX
 from jkit.identifier_convert import user_slug_to_url
-from litestar import Response, Router, get
+from litestar import Request, Response, Router, get
 from litestar.params import Parameter
-from litestar.status_codes import HTTP_500_INTERNAL_SERVER_ERROR
+from litestar.status_codes import HTTP_400_BAD_REQUEST, HTTP_500_INTERNAL_SERVER_ERROR
 from msgspec import Struct
 from sspeedup.api.litestar import (
     RESPONSE_STRUCT_CONFIG,
@@ -16,7 +17,17 @@ from sspeedup.api.litestar import (
 )
 
 from models.jianshu.lottery_win_record import LotteryWinRecord
-from models.jianshu.user import User
+from utils.lottery_win_index import LOTTERY_WIN_INDEX
+from utils.lottery_wins_history import LOTTERY_WINS_HISTORY_CACHE
+from utils.pagination import LotteryWinRecordCursor, decode_cursor, encode_cursor
+from utils.time_series import (
+    ColumnarSeries,
+    SeriesFormat,
+    generate_series_response_spec,
+    negotiated_success,
+    to_columnar,
+)
+from utils.user_name import get_user_names
 
 REWARD_NAMES: list[str] = [
     "收益加成卡100",
@@ -102,6 +113,7 @@ class GetRecordsItem(Struct, **RESPONSE_STRUCT_CONFIG):
 
 class GetRecordsResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     records: list[GetRecordsItem]
+    next_cursor: Optional[str]
 
 
 @get(
@@ -109,6 +121,7 @@ class GetRecordsResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     summary="获取中奖记录",
     responses={
         200: generate_response_spec(GetRecordsResponse),
+        400: generate_response_spec(),
     },
 )
 async def get_records_handler(
@@ -117,15 +130,34 @@ async def get_records_handler(
     excluded_awards: Annotated[
         Optional[list[str]], Parameter(description="排除奖项列表", max_items=10)
     ] = None,
+    cursor: Annotated[
+        Optional[str], Parameter(description="分页游标，传入时忽略分页偏移")
+    ] = None,
 ) -> Response:
+    try:
+        after = decode_cursor(cursor, LotteryWinRecordCursor) if cursor else None
+    except ValueError:
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="分页游标无效",
+        )
+
+    win_records = [
+        item
+        async for item in LotteryWinRecord.iter_by_excluded_awards(
+            excluded_awards=excluded_awards if excluded_awards else [],
+            offset=offset,
+            limit=limit,
+            after=(after.time, after.id) if after else None,
+        )
+    ]
+    # 一次查询获取本页全部用户的昵称
+    user_names = await get_user_names(item.user_slug for item in win_records)
+
     records: list[GetRecordsItem] = []
-    async for item in LotteryWinRecord.iter_by_excluded_awards(
-        excluded_awards=excluded_awards if excluded_awards else [],
-        offset=offset,
-        limit=limit,
-    ):
-        user = await User.get_by_slug(item.user_slug)
-        if not user:
+    for item in win_records:
+        if item.user_slug not in user_names:
             return fail(
                 http_code=HTTP_500_INTERNAL_SERVER_ERROR,
                 api_code=Code.UNKNOWN_SERVER_ERROR,
@@ -135,14 +167,24 @@ async def get_records_handler(
             GetRecordsItem(
                 time=item.time,
                 reward_name=item.award_name,
-                user_name=user.name or item.user_slug,
+                user_name=user_names[item.user_slug] or item.user_slug,
                 user_url=user_slug_to_url(item.user_slug),
             )
         )
 
+    # 本页记录数量不足时已没有下一页
+    next_cursor = (
+        encode_cursor(
+            LotteryWinRecordCursor(time=win_records[-1].time, id=win_records[-1].id)
+        )
+        if len(win_records) == limit
+        else None
+    )
+
     return success(
         data=GetRecordsResponse(
             records=records,
+            next_cursor=next_cursor,
         )
     )
 
@@ -171,13 +213,19 @@ async def get_summary_handler(
     range: Annotated[  # noqa: A002
         Literal["1d", "7d", "30d", "all"], Parameter(description="时间范围")
     ],
+    exact: Annotated[
+        bool, Parameter(description="直接查询数据库，起始时间不按小时取整")
+    ] = False,
 ) -> Response:
     td = RANGE_TO_TIMEDELTA[range]
 
-    wins_count, winners_count = await gather(
-        LotteryWinRecord.get_summary_wins_count(td),
-        LotteryWinRecord.get_summary_winners_count(td),
-    )
+    if exact:
+        wins_count, winners_count = await gather(
+            LotteryWinRecord.get_summary_wins_count(td),
+            LotteryWinRecord.get_summary_winners_count(td),
+        )
+    else:
+        wins_count, winners_count = await LOTTERY_WIN_INDEX.get_summary(td)
 
     average_wins_count_per_winner = get_summary_average_wins_count_per_winner(
         wins_count, winners_count
@@ -206,27 +254,168 @@ async def get_summary_handler(
 
 class GetRewardWinsHistoryResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     history: dict[datetime, int]
+    rewards_history: dict[str, dict[datetime, int]]
+
+
+class GetRewardWinsHistoryColumnarResponse(Struct, **RESPONSE_STRUCT_CONFIG):
+    history: ColumnarSeries
+    rewards_history: dict[str, ColumnarSeries]
 
 
 @get(
     "/reward-wins-history",
     summary="获取历史中奖数",
     responses={
-        200: generate_response_spec(GetRewardWinsHistoryResponse),
+        200: generate_series_response_spec(
+            GetRewardWinsHistoryResponse, GetRewardWinsHistoryColumnarResponse
+        ),
     },
 )
 async def get_reward_wins_history_handler(
+    request: Request,
     range: Annotated[Literal["1d", "30d", "60d"], Parameter(description="时间范围")],  # noqa: A002
     resolution: Annotated[Literal["1h", "1d"], Parameter(description="统计粒度")],
+    format_: Annotated[
+        SeriesFormat, Parameter(description="时间序列格式", query="format")
+    ] = "map",
 ) -> Response:
-    history = await LotteryWinRecord.get_wins_history(
+    history, rewards_history = await LOTTERY_WINS_HISTORY_CACHE.get_history(
         td=RANGE_TO_TIMEDELTA[range],  # type: ignore
         resolution=resolution,
     )
 
+    if format_ == "columnar":
+        return negotiated_success(
+            request,
+            GetRewardWinsHistoryColumnarResponse(
+                history=to_columnar(history),
+                rewards_history={
+                    key: to_columnar(value) for key, value in rewards_history.items()
+                },
+            ),
+        )
+
+    return negotiated_success(
+        request,
+        GetRewardWinsHistoryResponse(history=history, rewards_history=rewards_history),
+    )
+
+
+class GetLeaderboardItem(Struct, **RESPONSE_STRUCT_CONFIG):
+    ranking: int
+    user_name: str
+    user_url: str
+    wins_count: int
+
+
+class GetLeaderboardResponse(Struct, **RESPONSE_STRUCT_CONFIG):
+    records: list[GetLeaderboardItem]
+
+
+@get(
+    "/leaderboard",
+    summary="获取中奖次数排行榜",
+    responses={
+        200: generate_response_spec(GetLeaderboardResponse),
+        400: generate_response_spec(),
+    },
+)
+async def get_leaderboard_handler(
+    range: Annotated[  # noqa: A002
+        Literal["1d", "7d", "30d", "all"], Parameter(description="时间范围")
+    ],
+    reward_name: Annotated[
+        Optional[str], Parameter(description="奖项名称，不传入时统计全部奖项")
+    ] = None,
+    limit: Annotated[int, Parameter(description="结果数量", gt=0, le=100)] = 20,
+) -> Response:
+    if reward_name and reward_name not in REWARD_NAMES:
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="奖项名称无效",
+        )
+
+    leaderboard = await LOTTERY_WIN_INDEX.get_leaderboard(
+        period=RANGE_TO_TIMEDELTA[range], award_name=reward_name, limit=limit
+    )
+    user_names = await get_user_names(user_slug for user_slug, _ in leaderboard)
+
+    records: list[GetLeaderboardItem] = []
+    for index, (user_slug, wins_count) in enumerate(leaderboard):
+        # 中奖次数相同的用户排名相同
+        ranking = (
+            records[-1].ranking
+            if records and records[-1].wins_count == wins_count
+            else index + 1
+        )
+        records.append(
+            GetLeaderboardItem(
+                ranking=ranking,
+                user_name=user_names.get(user_slug) or user_slug,
+                user_url=user_slug_to_url(user_slug),
+                wins_count=wins_count,
+            )
+        )
+
+    return success(
+        data=GetLeaderboardResponse(
+            records=records,
+        )
+    )
+
+
+class GetWinsPercentileResponse(Struct, **RESPONSE_STRUCT_CONFIG):
+    wins_count: int
+    ranking: Optional[int]
+    percentile: float
+    winners_count: int
+
+
+@get(
+    "/wins-percentile",
+    summary="获取用户中奖次数百分位",
+    responses={
+        200: generate_response_spec(GetWinsPercentileResponse),
+        400: generate_response_spec(),
+    },
+)
+async def get_wins_percentile_handler(
+    user_slug: Annotated[
+        str, Parameter(description="用户 Slug", pattern=USER_SLUG_REGEX.pattern)
+    ],
+    range: Annotated[  # noqa: A002
+        Literal["1d", "7d", "30d", "all"], Parameter(description="时间范围")
+    ],
+    reward_name: Annotated[
+        Optional[str], Parameter(description="奖项名称，不传入时统计全部奖项")
+    ] = None,
+) -> Response:
+    if reward_name and reward_name not in REWARD_NAMES:
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="奖项名称无效",
+        )
+
+    (
+        wins_count,
+        ranking,
+        percentile,
+        winners_count,
+    ) = await LOTTERY_WIN_INDEX.get_user_stats(
+        user_slug=user_slug,
+        period=RANGE_TO_TIMEDELTA[range],
+        award_name=reward_name,
+    )
+
     return success(
-        data=GetRewardWinsHistoryResponse(
-            history=history,
+        data=GetWinsPercentileResponse(
+            wins_count=wins_count,
+            ranking=ranking,
+            # 中奖次数少于该用户的中奖用户比例
+            percentile=round(percentile, 5),
+            winners_count=winners_count,
         )
     )
 
@@ -238,6 +427,8 @@ LOTTERY_ROUTER = Router(
         get_records_handler,
         get_summary_handler,
         get_reward_wins_history_handler,
+        get_leaderboard_handler,
+        get_wins_percentile_handler,
     ],
     tags=["抽奖"],
 )
@@ -1,3 +1,4 @@
+from asyncio import Semaphore, gather
 from datetime import datetime
 from typing import Annotated, Literal, Optional
 
@@ -6,12 +7,13 @@ from jkit.exceptions import ResourceUnavailableError
 from jkit.identifier_check import is_user_slug
 from jkit.identifier_convert import article_slug_to_url, user_slug_to_url
 from jkit.user import MembershipEnum, User
-from litestar import Response, Router, get
+from litestar import Response, Router, get, post
 from litestar.params import Parameter
-from litestar.status_codes import HTTP_400_BAD_REQUEST
-from msgspec import Struct, field
+from litestar.status_codes import HTTP_200_OK, HTTP_400_BAD_REQUEST
+from msgspec import Meta, Struct, field
 from sspeedup.api.code import Code
 from sspeedup.api.litestar import (
+    REQUEST_STRUCT_CONFIG,
     RESPONSE_STRUCT_CONFIG,
     fail,
     generate_response_spec,
@@ -23,6 +25,17 @@ from models.jianshu.article_earning_ranking_record import (
 )
 from models.jianshu.lottery_win_record import LotteryWinRecord
 from models.jianshu.user import User as DbUser
+from utils.cache import SingleFlightTTLCache
+from utils.config import CONFIG
+from utils.log import logger
+from utils.pagination import (
+    ArticleEarningRankingRecordCursor,
+    LotteryWinRecordCursor,
+    decode_cursor,
+    encode_cursor,
+)
+from utils.user_history_name_index import USER_HISTORY_NAME_INDEX
+from utils.user_name_autocomplete import USER_NAME_AUTOCOMPLETE_INDEX
 
 
 class GetVipInfoResponse(Struct, **RESPONSE_STRUCT_CONFIG):
@@ -32,6 +45,28 @@ class GetVipInfoResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     expire_date: Optional[datetime]
 
 
+async def get_vip_info(user_slug: str) -> GetVipInfoResponse:
+    # 获取信息时会自动检查用户是否存在，不存在时抛出 ResourceUnavailableError
+    user_info = await User.from_slug(user_slug).info
+    membership_info = user_info.membership_info
+
+    return GetVipInfoResponse(
+        user_name=user_info.name,
+        is_vip=membership_info.type != MembershipEnum.NONE,
+        type=membership_info.type.value.replace("会员", ""),  # type: ignore
+        expire_date=membership_info.expired_at,
+    )
+
+
+VIP_INFO_CACHE: SingleFlightTTLCache[str, GetVipInfoResponse] = SingleFlightTTLCache(
+    get_vip_info,
+    ttl=CONFIG.cache.vip_info_ttl,
+    maxsize=10000,
+    negative_ttl=CONFIG.cache.vip_info_negative_ttl,
+    negative_exceptions=(ValueError, ResourceUnavailableError),
+)
+
+
 @get(
     "/{user_slug: str}/vip-info",
     summary="获取会员信息",
@@ -46,8 +81,7 @@ async def get_vip_info_handler(
     ],
 ) -> Response:
     try:
-        user = User.from_slug(user_slug)
-        await user.check()
+        vip_info = await VIP_INFO_CACHE.get(user_slug)
     except ValueError:
         return fail(
             http_code=HTTP_400_BAD_REQUEST,
@@ -61,22 +95,7 @@ async def get_vip_info_handler(
             msg="用户不存在或已注销 / 被封禁",
         )
 
-    user_info = await user.info
-    user_name = user_info.name
-    membership_info = user_info.membership_info
-
-    is_vip = membership_info.type != MembershipEnum.NONE
-    type_ = membership_info.type.value.replace("会员", "")
-    expire_date = membership_info.expired_at
-
-    return success(
-        data=GetVipInfoResponse(
-            user_name=user_name,
-            is_vip=is_vip,
-            type=type_,  # type: ignore
-            expire_date=expire_date,
-        )
-    )
+    return success(data=vip_info)
 
 
 class GetLotteryWinRecordItem(Struct, **RESPONSE_STRUCT_CONFIG):
@@ -86,6 +105,7 @@ class GetLotteryWinRecordItem(Struct, **RESPONSE_STRUCT_CONFIG):
 
 class GetLotteryWinRecordsResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     records: list[GetLotteryWinRecordItem]
+    next_cursor: Optional[str]
 
 
 @get(
@@ -105,6 +125,9 @@ async def get_lottery_win_records(
     excluded_awards: Annotated[
         Optional[list[str]], Parameter(description="排除奖项列表", max_items=10)
     ] = None,
+    cursor: Annotated[
+        Optional[str], Parameter(description="分页游标，传入时忽略分页偏移")
+    ] = None,
 ) -> Response:
     if not is_user_slug(user_slug):
         return fail(
@@ -113,19 +136,42 @@ async def get_lottery_win_records(
             msg="用户 Slug 无效",
         )
 
-    records: list[GetLotteryWinRecordItem] = [
-        GetLotteryWinRecordItem(time=item.time, reward_name=item.award_name)
+    try:
+        after = decode_cursor(cursor, LotteryWinRecordCursor) if cursor else None
+    except ValueError:
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="分页游标无效",
+        )
+
+    win_records = [
+        item
         async for item in LotteryWinRecord.iter_by_slug_and_excluded_awards(
             slug=user_slug,
             excluded_awards=excluded_awards if excluded_awards else [],
             offset=offset,
             limit=limit,
+            after=(after.time, after.id) if after else None,
         )
     ]
 
+    # 本页记录数量不足时已没有下一页
+    next_cursor = (
+        encode_cursor(
+            LotteryWinRecordCursor(time=win_records[-1].time, id=win_records[-1].id)
+        )
+        if len(win_records) == limit
+        else None
+    )
+
     return success(
         data=GetLotteryWinRecordsResponse(
-            records=records,
+            records=[
+                GetLotteryWinRecordItem(time=item.time, reward_name=item.award_name)
+                for item in win_records
+            ],
+            next_cursor=next_cursor,
         )
     )
 
@@ -140,6 +186,80 @@ class GetOnArticleRankRecordItem(Struct, **RESPONSE_STRUCT_CONFIG):
 
 class GetOnArticleRankRecordsResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     records: list[GetOnArticleRankRecordItem]
+    next_cursor: Optional[str] = None
+
+
+async def get_on_article_rank_records(
+    author_slug: str,
+    order_by: Literal["date", "ranking"],
+    order_direction: Literal["asc", "desc"],
+    offset: int,
+    limit: int,
+    cursor: Optional[str],
+) -> Response:
+    after: Optional[ArticleEarningRankingRecordCursor] = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, ArticleEarningRankingRecordCursor)
+        except ValueError:
+            after = None
+        # 游标与本次请求的排序方式不一致时同样视为无效
+        if (
+            not after
+            or after.order_by != order_by
+            or after.order_direction != order_direction
+        ):
+            return fail(
+                http_code=HTTP_400_BAD_REQUEST,
+                api_code=Code.BAD_ARGUMENTS,
+                msg="分页游标无效",
+            )
+
+    ranking_records = [
+        item
+        async for item in ArticleEarningRankingRecord.iter_by_author_slug(
+            author_slug=author_slug,
+            order_by=order_by,
+            order_direction=order_direction.upper(),  # type: ignore
+            offset=offset,
+            limit=limit,
+            after=(after.date, after.ranking) if after else None,
+        )
+    ]
+
+    # 本页记录数量不足时已没有下一页
+    next_cursor = (
+        encode_cursor(
+            ArticleEarningRankingRecordCursor(
+                order_by=order_by,
+                order_direction=order_direction,
+                date=ranking_records[-1].date,
+                ranking=ranking_records[-1].ranking,
+            )
+        )
+        if len(ranking_records) == limit
+        else None
+    )
+
+    return success(
+        data=GetOnArticleRankRecordsResponse(
+            records=[
+                GetOnArticleRankRecordItem(
+                    date=datetime(
+                        year=item.date.year, month=item.date.month, day=item.date.day
+                    ),
+                    ranking=item.ranking,
+                    # TODO
+                    article_title=item.title,  # type: ignore
+                    # TODO
+                    article_url=article_slug_to_url(item.slug),  # type: ignore
+                    FP_reward=item.author_earning,
+                )
+                for item in ranking_records
+            ],
+            next_cursor=next_cursor,
+        )
+    )
 
 
 @get(
@@ -162,6 +282,9 @@ async def get_on_article_rank_records_handler(
     ] = "desc",
     offset: Annotated[int, Parameter(description="分页偏移", ge=0)] = 0,
     limit: Annotated[int, Parameter(description="结果数量", gt=0, lt=100)] = 20,
+    cursor: Annotated[
+        Optional[str], Parameter(description="分页游标，传入时忽略分页偏移")
+    ] = None,
 ) -> Response:
     if not is_user_slug(user_slug):
         return fail(
@@ -170,31 +293,13 @@ async def get_on_article_rank_records_handler(
             msg="用户 Slug 无效",
         )
 
-    records = [
-        GetOnArticleRankRecordItem(
-            date=datetime(
-                year=item.date.year, month=item.date.month, day=item.date.day
-            ),
-            ranking=item.ranking,
-            # TODO
-            article_title=item.title,  # type: ignore
-            # TODO
-            article_url=article_slug_to_url(item.slug),  # type: ignore
-            FP_reward=item.author_earning,
-        )
-        async for item in ArticleEarningRankingRecord.iter_by_author_slug(
-            author_slug=user_slug,
-            order_by=order_by,
-            order_direction=order_direction.upper(),  # type: ignore
-            offset=offset,
-            limit=limit,
-        )
-    ]
-
-    return success(
-        data=GetOnArticleRankRecordsResponse(
-            records=records,
-        )
+    return await get_on_article_rank_records(
+        author_slug=user_slug,
+        order_by=order_by,
+        order_direction=order_direction,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
     )
 
 
@@ -216,36 +321,21 @@ async def get_on_article_rank_records_by_user_name_handler(
     ] = "desc",
     offset: Annotated[int, Parameter(description="分页偏移", ge=0)] = 0,
     limit: Annotated[int, Parameter(description="结果数量", gt=0, lt=100)] = 20,
+    cursor: Annotated[
+        Optional[str], Parameter(description="分页游标，传入时忽略分页偏移")
+    ] = None,
 ) -> Response:
     user = await DbUser.get_by_name(user_name)
     if not user:  # 没有找到对应昵称的用户
         return success(data=GetOnArticleRankRecordsResponse(records=[]))
 
-    records = [
-        GetOnArticleRankRecordItem(
-            date=datetime(
-                year=item.date.year, month=item.date.month, day=item.date.day
-            ),
-            ranking=item.ranking,
-            # TODO
-            article_title=item.title,  # type: ignore
-            # TODO
-            article_url=article_slug_to_url(item.slug),  # type: ignore
-            FP_reward=item.author_earning,
-        )
-        async for item in ArticleEarningRankingRecord.iter_by_author_slug(
-            author_slug=user.slug,
-            order_by=order_by,
-            order_direction=order_direction.upper(),  # type: ignore
-            offset=offset,
-            limit=limit,
-        )
-    ]
-
-    return success(
-        data=GetOnArticleRankRecordsResponse(
-            records=records,
-        )
+    return await get_on_article_rank_records(
+        author_slug=user.slug,
+        order_by=order_by,
+        order_direction=order_direction,
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
     )
 
 
@@ -254,6 +344,65 @@ class GetOnArticleRankSummaryResponse(Struct, **RESPONSE_STRUCT_CONFIG):
     top30: int
     top50: int
     total: int
+    # 排名阈值 -> 排名不高于该阈值的上榜次数
+    ranking_counts: dict[int, int]
+    total_earning: float
+    best_ranking: Optional[int]
+
+
+# 上榜摘要中固定统计的排名阈值
+DEFAULT_RANKING_THRESHOLDS: tuple[int, ...] = (10, 30, 50)
+
+
+# 合并默认排名阈值，阈值无效时返回 None
+def get_ranking_thresholds(thresholds: Optional[list[int]]) -> Optional[list[int]]:
+    result = sorted({*DEFAULT_RANKING_THRESHOLDS, *(thresholds or ())})
+    if not all(1 <= x <= 100 for x in result):
+        return None
+
+    return result
+
+
+def to_on_article_rank_summary(
+    thresholds: list[int],
+    summary: Optional[tuple[list[int], int, float, Optional[int]]],
+) -> GetOnArticleRankSummaryResponse:
+    counts, total, total_earning, best_ranking = (
+        summary if summary else ([0] * len(thresholds), 0, 0.0, None)
+    )
+    ranking_counts = dict(zip(thresholds, counts))
+
+    return GetOnArticleRankSummaryResponse(
+        top10=ranking_counts[10],
+        top30=ranking_counts[30],
+        top50=ranking_counts[50],
+        total=total,
+        ranking_counts=ranking_counts,
+        total_earning=total_earning,
+        best_ranking=best_ranking,
+    )
+
+
+async def get_on_article_rank_summary(
+    author_slug: Optional[str], thresholds: Optional[list[int]]
+) -> Response:
+    valid_thresholds = get_ranking_thresholds(thresholds)
+    if not valid_thresholds:
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="排名阈值无效",
+        )
+
+    summary = (
+        await ArticleEarningRankingRecord.get_summary_by_author_slug(
+            author_slug=author_slug, thresholds=valid_thresholds
+        )
+        if author_slug
+        else None  # 没有找到对应昵称的用户
+    )
+
+    return success(data=to_on_article_rank_summary(valid_thresholds, summary))
 
 
 @get(
@@ -268,6 +417,10 @@ async def get_on_article_rank_summary_handler(
     user_slug: Annotated[
         str, Parameter(description="用户 Slug", pattern=USER_SLUG_REGEX.pattern)
     ],
+    thresholds: Annotated[
+        Optional[list[int]],
+        Parameter(description="额外统计的排名阈值，范围为 1-100", max_items=10),
+    ] = None,
 ) -> Response:
     if not is_user_slug(user_slug):
         return fail(
@@ -276,32 +429,8 @@ async def get_on_article_rank_summary_handler(
             msg="用户 Slug 无效",
         )
 
-    top10 = 0
-    top30 = 0
-    top50 = 0
-    total = 0
-    async for item in ArticleEarningRankingRecord.iter_by_author_slug(
-        author_slug=user_slug,
-        order_by="date",
-        order_direction="ASC",
-        offset=0,
-        limit=100000,  # TODO
-    ):
-        total += 1
-        if item.ranking <= 10:
-            top10 += 1
-        if item.ranking <= 30:
-            top30 += 1
-        if item.ranking <= 50:
-            top50 += 1
-
-    return success(
-        data=GetOnArticleRankSummaryResponse(
-            top10=top10,
-            top30=top30,
-            top50=top50,
-            total=total,
-        )
+    return await get_on_article_rank_summary(
+        author_slug=user_slug, thresholds=thresholds
     )
 
 
@@ -315,39 +444,15 @@ async def get_on_article_rank_summary_handler(
 )
 async def get_on_article_rank_summary_by_user_name_handler(
     user_name: Annotated[str, Parameter(description="用户昵称", max_length=50)],
+    thresholds: Annotated[
+        Optional[list[int]],
+        Parameter(description="额外统计的排名阈值，范围为 1-100", max_items=10),
+    ] = None,
 ) -> Response:
     user = await DbUser.get_by_name(user_name)
-    if not user:  # 没有找到对应昵称的用户
-        return success(
-            data=GetOnArticleRankSummaryResponse(top10=0, top30=0, top50=0, total=0)
-        )
 
-    top10 = 0
-    top30 = 0
-    top50 = 0
-    total = 0
-    async for item in ArticleEarningRankingRecord.iter_by_author_slug(
-        author_slug=user.slug,
-        order_by="date",
-        order_direction="ASC",
-        offset=0,
-        limit=100000,  # TODO
-    ):
-        total += 1
-        if item.ranking <= 10:
-            top10 += 1
-        if item.ranking <= 30:
-            top30 += 1
-        if item.ranking <= 50:
-            top50 += 1
-
-    return success(
-        data=GetOnArticleRankSummaryResponse(
-            top10=top10,
-            top30=top30,
-            top50=top50,
-            total=total,
-        )
+    return await get_on_article_rank_summary(
+        author_slug=user.slug if user else None, thresholds=thresholds
     )
 
 
@@ -366,7 +471,7 @@ async def get_name_autocomplete_handler(
     name_part: Annotated[str, Parameter(description="用户昵称片段", max_length=50)],
     limit: Annotated[int, Parameter(description="结果数量", gt=0, le=100)] = 5,
 ) -> Response:
-    result = [item async for item in DbUser.iter_similar_names(name_part, limit=limit)]
+    result = await USER_NAME_AUTOCOMPLETE_INDEX.search(name_part, limit=limit)
 
     return success(
         data=GetNameAutocompleteResponse(
@@ -376,10 +481,14 @@ async def get_name_autocomplete_handler(
 
 
 class GetHistoryNamesOnArticleRankSummaryResponse(Struct, **RESPONSE_STRUCT_CONFIG):
-    history_names_onrank_summary: dict[str, int]
+    # 该用户使用过的其它昵称，不包括查询的昵称
+    history_names: list[str]
+    # 该用户的全部上榜次数，上榜记录中没有保存作者昵称，无法按昵称统计
+    on_rank_count: int
     user_url: Optional[str] = None
 
 
+# 昵称可以是用户的当前昵称或曾用昵称，返回该用户使用过的其它昵称与全部上榜次数
 @get(
     "/name/{user_name: str}/history-names-on-article-rank-summary",
     summary="获取用户曾用昵称上榜摘要",
@@ -391,20 +500,126 @@ async def get_history_names_on_article_rank_summary_handler(
     user_name: Annotated[str, Parameter(description="用户昵称", max_length=50)],
 ) -> Response:
     user = await DbUser.get_by_name(user_name)
-    if not user:  # 没有找到对应昵称的用户
+    if user:
+        user_slug = user.slug
+        names = (user.name, user.history_names)
+        on_rank_count = (
+            await USER_NAME_AUTOCOMPLETE_INDEX.get_on_rank_counts([user_slug])
+        )[user_slug]
+    else:
+        # 昵称可能是其它用户的曾用昵称
+        slugs = await USER_HISTORY_NAME_INDEX.get_slugs(user_name)
+        on_rank_counts = await USER_NAME_AUTOCOMPLETE_INDEX.get_on_rank_counts(slugs)
+        # 多个用户曾使用该昵称时，选择上榜次数最多的用户
+        user_slug = max(slugs, key=on_rank_counts.__getitem__, default=None)
+        names = (
+            await USER_HISTORY_NAME_INDEX.get_names(user_slug) if user_slug else None
+        )
+        on_rank_count = on_rank_counts[user_slug] if user_slug else 0
+
+    if not user_slug or not names:  # 没有找到对应昵称的用户
         return success(
             data=GetHistoryNamesOnArticleRankSummaryResponse(
-                history_names_onrank_summary={},
+                history_names=[], on_rank_count=0
             )
         )
 
-    history_names = user.history_names
-
+    name, history_names = names
     return success(
         data=GetHistoryNamesOnArticleRankSummaryResponse(
-            user_url=user_slug_to_url(user.slug),
-            # TODO: 全部曾上榜昵称均显示为 1 条记录
-            history_names_onrank_summary={x: 1 for x in history_names},
+            history_names=[x for x in (name, *history_names) if x and x != user_name],
+            on_rank_count=on_rank_count,
+            user_url=user_slug_to_url(user_slug),
+        )
+    )
+
+
+# 批量查询接口单次最多支持的用户数量
+BATCH_MAX_USERS = 50
+# 批量查询时同时进行的上游请求数量
+BATCH_CONCURRENCY = 8
+
+
+class PostBatchRequest(Struct, **REQUEST_STRUCT_CONFIG):
+    user_slugs: Annotated[list[str], Meta(min_length=1, max_length=BATCH_MAX_USERS)]
+    # 额外统计的排名阈值，范围为 1-100
+    thresholds: Optional[Annotated[list[int], Meta(max_length=10)]] = None
+
+
+class PostBatchItem(Struct, **RESPONSE_STRUCT_CONFIG):
+    user_slug: str
+    # 获取会员信息失败时为 None
+    vip_info: Optional[GetVipInfoResponse]
+    vip_info_error: Optional[str]
+    on_article_rank_summary: GetOnArticleRankSummaryResponse
+
+
+class PostBatchResponse(Struct, **RESPONSE_STRUCT_CONFIG):
+    users: list[PostBatchItem]
+
+
+async def get_vip_info_or_error(
+    user_slug: str, semaphore: Semaphore
+) -> tuple[Optional[GetVipInfoResponse], Optional[str]]:
+    async with semaphore:
+        try:
+            return await VIP_INFO_CACHE.get(user_slug), None
+        except ResourceUnavailableError:
+            return None, "用户不存在或已注销 / 被封禁"
+        # 单个用户的上游请求失败时不影响其它用户的结果
+        except Exception as e:  # noqa: BLE001
+            logger.error("获取会员信息失败", exception=e, user_slug=user_slug)
+            return None, "获取会员信息失败"
+
+
+@post(
+    "/batch",
+    summary="批量获取用户会员信息与上榜摘要",
+    status_code=HTTP_200_OK,
+    responses={
+        200: generate_response_spec(PostBatchResponse),
+        400: generate_response_spec(),
+    },
+)
+async def post_batch_handler(data: PostBatchRequest) -> Response:
+    # 去除重复的用户，保持原有顺序
+    user_slugs = list(dict.fromkeys(data.user_slugs))
+    if not all(is_user_slug(x) for x in user_slugs):
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="用户 Slug 无效",
+        )
+
+    thresholds = get_ranking_thresholds(data.thresholds)
+    if not thresholds:
+        return fail(
+            http_code=HTTP_400_BAD_REQUEST,
+            api_code=Code.BAD_ARGUMENTS,
+            msg="排名阈值无效",
+        )
+
+    semaphore = Semaphore(BATCH_CONCURRENCY)
+    summaries, *vip_infos = await gather(
+        ArticleEarningRankingRecord.get_summaries_by_author_slugs(
+            author_slugs=user_slugs, thresholds=thresholds
+        ),
+        *(get_vip_info_or_error(x, semaphore) for x in user_slugs),
+    )
+
+    return success(
+        data=PostBatchResponse(
+            users=[
+                PostBatchItem(
+                    user_slug=user_slug,
+                    vip_info=vip_info,
+                    vip_info_error=vip_info_error,
+                    on_article_rank_summary=to_on_article_rank_summary(
+                        thresholds, summaries.get(user_slug)
+                    ),
+                )
+                for user_slug, (vip_info, vip_info_error) in zip(user_slugs, vip_infos)
+            ]
         )
     )
 
@@ -420,6 +635,7 @@ USERS_ROUTER = Router(
         get_on_article_rank_summary_by_user_name_handler,
         get_name_autocomplete_handler,
         get_history_names_on_article_rank_summary_handler,
+        post_batch_handler,
     ],
     tags=["用户"],
 )
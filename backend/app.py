@@ -4,6 +4,11 @@ from litestar.openapi.spec import Server
 from sspeedup.api.litestar import EXCEPTION_HANDLERS
 
 from api import API_ROUTER
+from utils.ftn_macket_rollup import start_ftn_macket_rollup_sync
+from utils.lp_recommend import LP_RECOMMEND_ELIGIBILITY_INDEX
+from utils.user_history_name_index import USER_HISTORY_NAME_INDEX
+from utils.user_name_autocomplete import USER_NAME_AUTOCOMPLETE_INDEX
+from utils.word_split import splitter
 
 
 class CustomOpenAPIController(OpenAPIController):
@@ -22,6 +27,13 @@ class CustomOpenAPIController(OpenAPIController):
 app = Litestar(
     route_handlers=[API_ROUTER],
     exception_handlers=EXCEPTION_HANDLERS,
+    on_startup=[
+        USER_NAME_AUTOCOMPLETE_INDEX.start,
+        USER_HISTORY_NAME_INDEX.start,
+        LP_RECOMMEND_ELIGIBILITY_INDEX.start,
+        start_ftn_macket_rollup_sync,
+    ],
+    on_shutdown=[splitter.close],
     openapi_config=OpenAPIConfig(
         openapi_controller=CustomOpenAPIController,
         title="JTools API",
@@ -0,0 +1,54 @@
+from datetime import datetime
+from typing import Optional
+
+from sshared.postgres import Table
+from sshared.strict_struct import NonEmptyStr, PositiveInt
+
+from utils.db import jtools_pool
+
+
+class ArticleWordFreq(Table, frozen=True):
+    slug: NonEmptyStr
+    # 文章正文的 SHA-256 摘要，正文变化后缓存失效
+    content_hash: bytes
+    # 按出现次数降序排列
+    words: list[NonEmptyStr]
+    counts: list[PositiveInt]
+    update_time: datetime
+
+    @classmethod
+    async def get_word_freq(
+        cls, slug: str, content_hash: bytes
+    ) -> Optional[dict[str, int]]:
+        async with jtools_pool.get_conn() as conn:
+            cursor = await conn.execute(
+                "SELECT words, counts FROM article_word_freqs "
+                "WHERE slug = %s AND content_hash = %s;",
+                (slug, content_hash),
+            )
+
+            data = await cursor.fetchone()
+        if not data:
+            return None
+
+        return dict(zip(data[0], data[1]))
+
+    @classmethod
+    async def upsert(
+        cls, slug: str, content_hash: bytes, word_freq: dict[str, int]
+    ) -> None:
+        async with jtools_pool.get_conn() as conn:
+            await conn.execute(
+                "INSERT INTO article_word_freqs (slug, content_hash, words, counts, "
+                "update_time) VALUES (%s, %s, %s, %s, %s) "
+                "ON CONFLICT (slug) DO UPDATE SET "
+                "content_hash = EXCLUDED.content_hash, words = EXCLUDED.words, "
+                "counts = EXCLUDED.counts, update_time = EXCLUDED.update_time;",
+                (
+                    slug,
+                    content_hash,
+                    list(word_freq.keys()),
+                    list(word_freq.values()),
+                    datetime.now(),
+                ),
+            )
@@ -0,0 +1,122 @@
+from collections.abc import AsyncGenerator
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+
+from sshared.postgres import Table
+from sshared.strict_struct import NonNegativeInt, PositiveFloat, PositiveInt
+
+from utils.db import jtools_pool
+
+
+class FTNMacketBucketRollup(Table, frozen=True):
+    resolution: timedelta
+    type: Literal["BUY", "SELL"]
+    bucket_time: datetime
+    open_price: PositiveFloat
+    close_price: PositiveFloat
+    min_price: PositiveFloat
+    max_price: PositiveFloat
+    amount_sum: NonNegativeInt
+    snapshots_count: PositiveInt
+
+    @classmethod
+    async def refresh(cls, resolution: timedelta, start_time: datetime) -> None:
+        # 根据快照汇总数据，重新计算 start_time 所在时间段及之后的全部时间段
+        async with jtools_pool.get_conn() as conn:
+            await conn.execute(
+                "INSERT INTO ftn_macket_bucket_rollups (resolution, type, "
+                "bucket_time, open_price, close_price, min_price, max_price, "
+                "amount_sum, snapshots_count) "
+                "SELECT %(resolution)s, "
+                "type::TEXT::enum_ftn_macket_bucket_rollups_type, "
+                "DATE_BIN(%(resolution)s, fetch_time, TIMESTAMP '2000-01-01') "
+                "AS bucket_time, "
+                "(ARRAY_AGG(CASE WHEN type = 'BUY' THEN min_price ELSE max_price END "
+                "ORDER BY fetch_time))[1], "
+                "(ARRAY_AGG(CASE WHEN type = 'BUY' THEN min_price ELSE max_price END "
+                "ORDER BY fetch_time DESC))[1], "
+                "MIN(min_price), MAX(max_price), SUM(amount), COUNT(*) "
+                "FROM ftn_macket_snapshot_rollups WHERE fetch_time >= "
+                "DATE_BIN(%(resolution)s, %(start_time)s, TIMESTAMP '2000-01-01') "
+                "GROUP BY type, bucket_time "
+                "ON CONFLICT (resolution, type, bucket_time) DO UPDATE SET "
+                "open_price = EXCLUDED.open_price, "
+                "close_price = EXCLUDED.close_price, "
+                "min_price = EXCLUDED.min_price, max_price = EXCLUDED.max_price, "
+                "amount_sum = EXCLUDED.amount_sum, "
+                "snapshots_count = EXCLUDED.snapshots_count;",
+                {"resolution": resolution, "start_time": start_time},
+            )
+
+    @classmethod
+    async def iter_history(
+        cls, start_time: datetime, resolution: timedelta
+    ) -> AsyncGenerator[tuple[datetime, Literal["BUY", "SELL"], float, int]]:
+        async with jtools_pool.get_conn() as conn:
+            cursor = await conn.execute(
+                "SELECT bucket_time, type, CASE WHEN type = 'BUY' THEN min_price "
+                "ELSE max_price END, (amount_sum::NUMERIC / snapshots_count)::INTEGER "
+                "FROM ftn_macket_bucket_rollups WHERE resolution = %(resolution)s "
+                "AND bucket_time >= DATE_BIN(%(resolution)s, %(start_time)s, "
+                "TIMESTAMP '2000-01-01') ORDER BY bucket_time;",
+                {"resolution": resolution, "start_time": start_time},
+            )
+
+            async for item in cursor:
+                yield (item[0], item[1], item[2], item[3])
+
+    # 传入 after 时从上一页最后一条记录之后开始查找
+    @classmethod
+    async def get_by_time_range(
+        cls,
+        resolution: timedelta,
+        start_time: datetime,
+        end_time: datetime,
+        limit: int,
+        after: Optional[tuple[datetime, Literal["BUY", "SELL"]]] = None,
+    ) -> list[
+        tuple[datetime, Literal["BUY", "SELL"], float, float, float, float, int, int]
+    ]:
+        params = {
+            "resolution": resolution,
+            "start_time": start_time,
+            "end_time": end_time,
+            "limit": limit,
+        }
+        async with jtools_pool.get_conn() as conn:
+            if after:
+                cursor = await conn.execute(
+                    "SELECT bucket_time, type, open_price, close_price, min_price, "
+                    "max_price, (amount_sum::NUMERIC / snapshots_count)::INTEGER, "
+                    "snapshots_count FROM ftn_macket_bucket_rollups "
+                    "WHERE resolution = %(resolution)s AND bucket_time >= "
+                    "%(start_time)s AND bucket_time < %(end_time)s "
+                    "AND (bucket_time, type) > (%(after_time)s, "
+                    "%(after_type)s::enum_ftn_macket_bucket_rollups_type) "
+                    "ORDER BY bucket_time, type LIMIT %(limit)s;",
+                    {**params, "after_time": after[0], "after_type": after[1]},
+                )
+            else:
+                cursor = await conn.execute(
+                    "SELECT bucket_time, type, open_price, close_price, min_price, "
+                    "max_price, (amount_sum::NUMERIC / snapshots_count)::INTEGER, "
+                    "snapshots_count FROM ftn_macket_bucket_rollups "
+                    "WHERE resolution = %(resolution)s AND bucket_time >= "
+                    "%(start_time)s AND bucket_time < %(end_time)s "
+                    "ORDER BY bucket_time, type LIMIT %(limit)s;",
+                    params,
+                )
+
+            return [
+                (
+                    item[0],
+                    item[1],
+                    item[2],
+                    item[3],
+                    item[4],
+                    item[5],
+                    item[6],
+                    item[7],
+                )
+                for item in await cursor.fetchall()
+            ]
@@ -0,0 +1,49 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from sshared.postgres import Table
+from sshared.strict_struct import NonNegativeInt, PositiveFloat
+
+from utils.db import jtools_pool
+
+
+class FTNMacketSnapshotRollup(Table, frozen=True):
+    fetch_time: datetime
+    type: Literal["BUY", "SELL"]
+    min_price: PositiveFloat
+    max_price: PositiveFloat
+    amount: NonNegativeInt
+
+    @classmethod
+    async def create_many(cls, items: list["FTNMacketSnapshotRollup"]) -> None:
+        for item in items:
+            item.validate()
+
+        async with jtools_pool.get_conn() as conn, conn.cursor() as cursor:
+            # 最新一次快照可能在上次汇总时尚未写入完成，因此允许覆盖
+            await cursor.executemany(
+                "INSERT INTO ftn_macket_snapshot_rollups (fetch_time, type, "
+                "min_price, max_price, amount) VALUES (%s, %s, %s, %s, %s) "
+                "ON CONFLICT (fetch_time, type) DO UPDATE SET "
+                "min_price = EXCLUDED.min_price, max_price = EXCLUDED.max_price, "
+                "amount = EXCLUDED.amount;",
+                [
+                    (
+                        item.fetch_time,
+                        item.type,
+                        item.min_price,
+                        item.max_price,
+                        item.amount,
+                    )
+                    for item in items
+                ],
+            )
+
+    @classmethod
+    async def get_latest_fetch_time(cls) -> Optional[datetime]:
+        async with jtools_pool.get_conn() as conn:
+            cursor = await conn.execute(
+                "SELECT MAX(fetch_time) FROM ftn_macket_snapshot_rollups;"
+            )
+
+            return (await cursor.fetchone())[0]  # type: ignore
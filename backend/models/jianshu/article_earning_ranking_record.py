@@ -1,4 +1,4 @@
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Sequence
 from datetime import date
 from typing import Literal, Optional
 
@@ -27,24 +27,44 @@ class ArticleEarningRankingRecord(Table, frozen=True):
         order_direction: Literal["ASC", "DESC"],
         offset: int,
         limit: int,
+        after: Optional[tuple[date, int]] = None,
     ) -> AsyncGenerator["ArticleEarningRankingRecord"]:
+        # 同一作者同一天的上榜排名不会重复，使用另一列保证排序结果唯一
+        order_columns = (
+            (sql.Identifier("date"), sql.Identifier("ranking"))
+            if order_by == "date"
+            else (sql.Identifier("ranking"), sql.Identifier("date"))
+        )
+        direction = sql.SQL("ASC") if order_direction == "ASC" else sql.SQL("DESC")
+
         async with jianshu_pool.get_conn() as conn:
-            if order_direction == "ASC":
+            # 传入 after 时从上一页最后一条记录之后开始查找，不再使用 OFFSET
+            if after:
+                after_values = after if order_by == "date" else (after[1], after[0])
                 cursor = await conn.execute(
                     sql.SQL(
                         "SELECT date, ranking, slug, title, author_earning, "
                         "voter_earning FROM article_earning_ranking_records "
-                        "WHERE author_slug = %s ORDER BY {} OFFSET %s LIMIT %s;"
-                    ).format(sql.Identifier(order_by)),
-                    (author_slug, offset, limit),
+                        "WHERE author_slug = %s AND ({}, {}) {} (%s, %s) "
+                        "ORDER BY {} {}, {} {} LIMIT %s;"
+                    ).format(
+                        *order_columns,
+                        sql.SQL(">") if order_direction == "ASC" else sql.SQL("<"),
+                        order_columns[0],
+                        direction,
+                        order_columns[1],
+                        direction,
+                    ),
+                    (author_slug, *after_values, limit),
                 )
             else:
                 cursor = await conn.execute(
                     sql.SQL(
                         "SELECT date, ranking, slug, title, author_earning, "
                         "voter_earning FROM article_earning_ranking_records "
-                        "WHERE author_slug = %s ORDER BY {} DESC OFFSET %s LIMIT %s;"
-                    ).format(sql.Identifier(order_by)),
+                        "WHERE author_slug = %s ORDER BY {} {}, {} {} "
+                        "OFFSET %s LIMIT %s;"
+                    ).format(order_columns[0], direction, order_columns[1], direction),
                     (author_slug, offset, limit),
                 )
 
@@ -60,62 +80,119 @@ class ArticleEarningRankingRecord(Table, frozen=True):
                 )
 
     @classmethod
-    async def get_latest_record(
-        cls, author_slug: str, minimum_ranking: Optional[int] = None
-    ) -> Optional["ArticleEarningRankingRecord"]:
+    async def get_latest_date(cls) -> Optional[date]:
         async with jianshu_pool.get_conn() as conn:
             cursor = await conn.execute(
-                "SELECT date, ranking, slug, title, author_earning, voter_earning "
-                "FROM article_earning_ranking_records WHERE author_slug = %s AND "
-                "ranking <= %s ORDER BY date DESC, ranking DESC LIMIT 1;",
-                (author_slug, minimum_ranking if minimum_ranking else 100),
+                "SELECT MAX(date) FROM article_earning_ranking_records;"
             )
 
             data = await cursor.fetchone()
-        if not data:
-            return None
-
-        return cls(
-            date=data[0],
-            ranking=data[1],
-            slug=data[2],
-            title=data[3],
-            author_slug=author_slug,
-            author_earning=data[4],
-            voter_earning=data[5],
-        )
 
+        return data[0] if data else None
+
+    # 返回最新上榜日期及该日期的记录数，数据库中没有数据时返回 None
     @classmethod
-    async def get_pervious_record(
-        cls,
-        base_record: "ArticleEarningRankingRecord",
-        minimum_ranking: Optional[int] = None,
-    ) -> Optional["ArticleEarningRankingRecord"]:
+    async def get_latest_date_and_count(cls) -> Optional[tuple[date, int]]:
         async with jianshu_pool.get_conn() as conn:
             cursor = await conn.execute(
-                "SELECT date, ranking, slug, title, author_earning, voter_earning "
-                "FROM article_earning_ranking_records WHERE ( date < %s OR "
-                "( date = %s AND ranking < %s ) ) AND author_slug = %s "
-                "AND ranking <= %s ORDER BY date DESC, ranking DESC LIMIT 1;",
-                (
-                    base_record.date,
-                    base_record.date,
-                    base_record.ranking,
-                    base_record.author_slug,
-                    minimum_ranking if minimum_ranking else 100,
-                ),
+                "SELECT date, COUNT(*) FROM article_earning_ranking_records "
+                "WHERE date = (SELECT MAX(date) FROM article_earning_ranking_records) "
+                "GROUP BY date;"
             )
 
             data = await cursor.fetchone()
-        if not data:
-            return None
-
-        return cls(
-            date=data[0],
-            ranking=data[1],
-            slug=data[2],
-            title=data[3],
-            author_slug=base_record.author_slug,
-            author_earning=data[4],
-            voter_earning=data[5],
-        )
+
+        return (data[0], data[1]) if data else None
+
+    # 返回各作者在 before_date 之前的上榜次数
+    @classmethod
+    async def iter_on_rank_counts(
+        cls, before_date: date
+    ) -> AsyncGenerator[tuple[str, int]]:
+        async with jianshu_pool.get_conn() as conn:
+            cursor = await conn.execute(
+                "SELECT author_slug, COUNT(*) FROM article_earning_ranking_records "
+                "WHERE author_slug IS NOT NULL AND date < %s GROUP BY author_slug;",
+                (before_date,),
+            )
+
+            async for item in cursor:
+                yield item[0], item[1]
+
+    # 返回各作者每天的上榜次数，传入 since_date 时仅统计该日期及之后的记录
+    @classmethod
+    async def iter_daily_on_rank_counts(
+        cls, since_date: Optional[date] = None
+    ) -> AsyncGenerator[tuple[str, date, int]]:
+        async with jianshu_pool.get_conn() as conn:
+            cursor = await conn.execute(
+                "SELECT author_slug, date, COUNT(*) "
+                "FROM article_earning_ranking_records "
+                "WHERE author_slug IS NOT NULL AND date >= %s "
+                "GROUP BY author_slug, date;",
+                (since_date if since_date else date.min,),
+            )
+
+            async for item in cursor:
+                yield item[0], item[1], item[2]
+
+    # 返回各作者排名不高于各阈值的上榜次数、总上榜次数、作者总收益与最高排名，
+    # 结果中不包含没有上榜记录的作者
+    @classmethod
+    async def get_summaries_by_author_slugs(
+        cls, author_slugs: list[str], thresholds: Sequence[int]
+    ) -> dict[str, tuple[list[int], int, float, Optional[int]]]:
+        async with jianshu_pool.get_conn() as conn:
+            cursor = await conn.execute(
+                sql.SQL(
+                    "SELECT author_slug, {}COUNT(*), SUM(author_earning), "
+                    "MIN(ranking) FROM article_earning_ranking_records "
+                    "WHERE author_slug = ANY(%s) GROUP BY author_slug;"
+                ).format(
+                    sql.SQL("").join(
+                        sql.SQL("COUNT(*) FILTER (WHERE ranking <= %s), ")
+                        for _ in thresholds
+                    )
+                ),
+                (*thresholds, author_slugs),
+            )
+
+            result: dict[str, tuple[list[int], int, float, Optional[int]]] = {}
+            async for item in cursor:
+                counts = list(item[1 : len(thresholds) + 1])
+                total, total_earning, best_ranking = item[len(thresholds) + 1 :]
+                result[item[0]] = (counts, total, float(total_earning), best_ranking)
+
+        return result
+
+    @classmethod
+    async def get_summary_by_author_slug(
+        cls, author_slug: str, thresholds: Sequence[int]
+    ) -> tuple[list[int], int, float, Optional[int]]:
+        summaries = await cls.get_summaries_by_author_slugs([author_slug], thresholds)
+
+        return summaries.get(author_slug, ([0] * len(thresholds), 0, 0.0, None))
+
+    # 返回全部作者排名不低于 maximum_ranking 的上榜记录，按作者分组，
+    # 同一作者的记录按日期与排名降序排列
+    @classmethod
+    async def iter_all_ranking_history(
+        cls, maximum_ranking: int
+    ) -> AsyncGenerator[tuple[str, date, int, Optional[str]]]:
+        async with jianshu_pool.get_conn() as conn, conn.transaction():
+            # 数据量较大，使用服务端游标分批获取
+            cursor = conn.cursor(name="article_earning_ranking_records_history")
+            cursor.itersize = 5000
+            try:
+                await cursor.execute(
+                    "SELECT author_slug, date, ranking, slug "
+                    "FROM article_earning_ranking_records "
+                    "WHERE author_slug IS NOT NULL AND ranking <= %s "
+                    "ORDER BY author_slug, date DESC, ranking DESC;",
+                    (maximum_ranking,),
+                )
+
+                async for item in cursor:
+                    yield (item[0], item[1], item[2], item[3])
+            finally:
+                await cursor.close()
@@ -2,6 +2,7 @@ from collections.abc import AsyncGenerator
 from datetime import datetime, timedelta
 from typing import Optional
 
+from psycopg import sql
 from sshared.postgres import Table
 from sshared.strict_struct import NonEmptyStr, PositiveInt
 from sspeedup.time_helper import get_start_time
@@ -24,14 +25,28 @@ class LotteryWinRecord(Table, frozen=True):
 
     @classmethod
     async def iter_by_excluded_awards(
-        cls, excluded_awards: list[str], offset: int, limit: int
+        cls,
+        excluded_awards: list[str],
+        offset: int,
+        limit: int,
+        after: Optional[tuple[datetime, int]] = None,
     ) -> AsyncGenerator["LotteryWinRecord"]:
         async with jianshu_pool.get_conn() as conn:
-            cursor = await conn.execute(
-                "SELECT id, time, user_slug, award_name FROM lottery_win_records "
-                "WHERE award_name != ALL(%s) ORDER BY time DESC OFFSET %s LIMIT %s;",
-                (excluded_awards, offset, limit),
-            )
+            # 传入 after 时从上一页最后一条记录之后开始查找，不再使用 OFFSET
+            if after:
+                cursor = await conn.execute(
+                    "SELECT id, time, user_slug, award_name FROM lottery_win_records "
+                    "WHERE award_name != ALL(%s) AND (time, id) < (%s, %s) "
+                    "ORDER BY time DESC, id DESC LIMIT %s;",
+                    (excluded_awards, after[0], after[1], limit),
+                )
+            else:
+                cursor = await conn.execute(
+                    "SELECT id, time, user_slug, award_name FROM lottery_win_records "
+                    "WHERE award_name != ALL(%s) ORDER BY time DESC, id DESC "
+                    "OFFSET %s LIMIT %s;",
+                    (excluded_awards, offset, limit),
+                )
 
             async for item in cursor:
                 yield cls(
@@ -43,15 +58,28 @@ class LotteryWinRecord(Table, frozen=True):
 
     @classmethod
     async def iter_by_slug_and_excluded_awards(
-        cls, slug: str, excluded_awards: list[str], offset: int, limit: int
+        cls,
+        slug: str,
+        excluded_awards: list[str],
+        offset: int,
+        limit: int,
+        after: Optional[tuple[datetime, int]] = None,
     ) -> AsyncGenerator["LotteryWinRecord"]:
         async with jianshu_pool.get_conn() as conn:
-            cursor = await conn.execute(
-                "SELECT id, time, award_name FROM lottery_win_records "
-                "WHERE user_slug = %s AND award_name != ALL(%s) "
-                "ORDER BY time DESC OFFSET %s LIMIT %s;",
-                (slug, excluded_awards, offset, limit),
-            )
+            if after:
+                cursor = await conn.execute(
+                    "SELECT id, time, award_name FROM lottery_win_records "
+                    "WHERE user_slug = %s AND award_name != ALL(%s) "
+                    "AND (time, id) < (%s, %s) ORDER BY time DESC, id DESC LIMIT %s;",
+                    (slug, excluded_awards, after[0], after[1], limit),
+                )
+            else:
+                cursor = await conn.execute(
+                    "SELECT id, time, award_name FROM lottery_win_records "
+                    "WHERE user_slug = %s AND award_name != ALL(%s) "
+                    "ORDER BY time DESC, id DESC OFFSET %s LIMIT %s;",
+                    (slug, excluded_awards, offset, limit),
+                )
 
             async for item in cursor:
                 yield cls(
@@ -61,6 +89,26 @@ class LotteryWinRecord(Table, frozen=True):
                     award_name=item[2],
                 )
 
+    @classmethod
+    async def iter_after_id(
+        cls, last_id: int
+    ) -> AsyncGenerator[tuple[int, datetime, str, str]]:
+        async with jianshu_pool.get_conn() as conn, conn.transaction():
+            # 首次获取时数据量较大，使用服务端游标分批获取
+            cursor = conn.cursor(name="lottery_win_records_after_id")
+            cursor.itersize = 5000
+            try:
+                await cursor.execute(
+                    "SELECT id, time, user_slug, award_name FROM lottery_win_records "
+                    "WHERE id > %s ORDER BY id;",
+                    (last_id,),
+                )
+
+                async for item in cursor:
+                    yield (item[0], item[1], item[2], item[3])
+            finally:
+                await cursor.close()
+
     @classmethod
     async def get_summary_wins_count(cls, td: Optional[timedelta]) -> dict[str, int]:
         async with jianshu_pool.get_conn() as conn:
@@ -101,25 +149,38 @@ class LotteryWinRecord(Table, frozen=True):
         return result
 
     @classmethod
-    async def get_wins_history(
-        cls, td: timedelta, resolution: str
-    ) -> dict[datetime, int]:
+    async def iter_wins_count_by_award(
+        cls,
+        start_time: datetime,
+        end_time: Optional[datetime],
+        resolution: str,
+    ) -> AsyncGenerator[tuple[datetime, str, int]]:
+        if resolution == "1h":
+            time_expr = sql.SQL("DATE_TRUNC('hour', time)")
+        elif resolution == "1d":
+            time_expr = sql.SQL("DATE_TRUNC('day', time)")
+        else:
+            raise ValueError(f"错误的 resolution 取值：{resolution}")
+
         async with jianshu_pool.get_conn() as conn:
-            if resolution == "1h":
+            if end_time:
                 cursor = await conn.execute(
-                    "SELECT DATE_TRUNC('hour', time) AS time, COUNT(*) "
-                    "FROM lottery_win_records WHERE time >= %s GROUP BY "
-                    "DATE_TRUNC('hour', time) ORDER BY DATE_TRUNC('hour', time);",
-                    (get_start_time(td),),
+                    sql.SQL(
+                        "SELECT {} AS bucket_time, award_name, COUNT(*) "
+                        "FROM lottery_win_records WHERE time >= %s AND time < %s "
+                        "GROUP BY bucket_time, award_name ORDER BY bucket_time;"
+                    ).format(time_expr),
+                    (start_time, end_time),
                 )
-            elif resolution == "1d":
+            else:
                 cursor = await conn.execute(
-                    "SELECT DATE_TRUNC('day', time) AS time, COUNT(*) "
-                    "FROM lottery_win_records WHERE time >= %s GROUP BY "
-                    "DATE_TRUNC('day', time) ORDER BY DATE_TRUNC('day', time);",
-                    (get_start_time(td),),
+                    sql.SQL(
+                        "SELECT {} AS bucket_time, award_name, COUNT(*) "
+                        "FROM lottery_win_records WHERE time >= %s "
+                        "GROUP BY bucket_time, award_name ORDER BY bucket_time;"
+                    ).format(time_expr),
+                    (start_time,),
                 )
-            else:
-                raise ValueError(f"错误的 resolution 取值：{resolution}")
 
-            return {item[0]: item[1] async for item in cursor}
+            async for item in cursor:
+                yield (item[0], item[1], item[2])
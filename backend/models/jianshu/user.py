@@ -76,17 +76,33 @@ class User(Table, frozen=True):
             avatar_url=data[5],
         )
 
+    # 返回有曾用昵称的用户，传入 updated_after 时仅返回此后更新过的用户
     @classmethod
-    async def iter_similar_names(cls, name: str, limit: int) -> AsyncGenerator[str]:
+    async def iter_history_names(
+        cls, updated_after: Optional[datetime] = None
+    ) -> AsyncGenerator[tuple[str, Optional[str], list[str], datetime]]:
+        async with jianshu_pool.get_conn() as conn, conn.transaction():
+            # 首次获取时数据量较大，使用服务端游标分批获取
+            cursor = conn.cursor(name="users_history_names")
+            cursor.itersize = 5000
+            try:
+                await cursor.execute(
+                    "SELECT slug, name, history_names, update_time FROM users "
+                    "WHERE cardinality(history_names) > 0 AND update_time > %s;",
+                    (updated_after if updated_after else datetime.min,),
+                )
+
+                async for item in cursor:
+                    yield (item[0], item[1], item[2], item[3])
+            finally:
+                await cursor.close()
+
+    @classmethod
+    async def get_names_by_slugs(cls, slugs: list[str]) -> dict[str, Optional[str]]:
         async with jianshu_pool.get_conn() as conn:
             cursor = await conn.execute(
-                "SELECT users.name, COUNT(*) FROM users "
-                "JOIN article_earning_ranking_records ON users.slug = "
-                "article_earning_ranking_records.author_slug "
-                "WHERE users.name LIKE %s GROUP BY users.name "
-                "ORDER BY count DESC LIMIT %s;",
-                (f"{name}%", limit),
+                "SELECT slug, name FROM users WHERE slug = ANY(%s);",
+                (slugs,),
             )
 
-            async for item in cursor:
-                yield item[0]
+            return {item[0]: item[1] async for item in cursor}
@@ -1,5 +1,6 @@
+from collections.abc import AsyncGenerator
 from datetime import datetime
-from typing import Literal
+from typing import Literal, Optional
 
 from sshared.postgres import Table
 from sshared.strict_struct import NonNegativeInt, PositiveFloat, PositiveInt
@@ -18,148 +19,56 @@ class FTNMacketRecord(Table, frozen=True):
     minimum_trade_amount: PositiveInt
 
     @classmethod
-    async def get_current_price(cls, type: Literal["BUY", "SELL"]) -> float:  # noqa: A002
-        async with jpep_pool.get_conn() as conn:
-            if type == "BUY":
-                cursor = await conn.execute(
-                    "SELECT MIN(price) FROM ftn_macket_records "
-                    "JOIN ftn_orders ON ftn_macket_records.id = ftn_orders.id "
-                    "WHERE type = 'BUY' AND remaining_amount > 0 "
-                    "AND fetch_time = (SELECT MAX(fetch_time) FROM ftn_macket_records);"
-                )
-            else:
-                cursor = await conn.execute(
-                    "SELECT MAX(price) FROM ftn_macket_records "
-                    "JOIN ftn_orders ON ftn_macket_records.id = ftn_orders.id "
-                    "WHERE type = 'SELL' AND remaining_amount > 0 "
-                    "AND fetch_time = (SELECT MAX(fetch_time) FROM ftn_macket_records);"
-                )
-
-            return (await cursor.fetchone())[0]  # type: ignore
-
-    @classmethod
-    async def get_current_amount(cls, type: Literal["BUY", "SELL"]) -> int:  # noqa: A002
+    async def iter_orders_by_fetch_time(
+        cls, fetch_time: datetime
+    ) -> AsyncGenerator[tuple[Literal["BUY", "SELL"], float, int]]:
         async with jpep_pool.get_conn() as conn:
             cursor = await conn.execute(
-                "SELECT SUM(remaining_amount) FROM ftn_macket_records "
+                "SELECT type, price, remaining_amount FROM ftn_macket_records "
                 "JOIN ftn_orders ON ftn_macket_records.id = ftn_orders.id "
-                "WHERE type = %s AND fetch_time = "
-                "(SELECT MAX(fetch_time) FROM ftn_macket_records);",
-                (type,),
+                "WHERE fetch_time = %s;",
+                (fetch_time,),
             )
 
-            return (await cursor.fetchone())[0]  # type: ignore
+            async for item in cursor:
+                yield (item[0], item[1], item[2])
 
     @classmethod
-    async def get_current_amount_distribution(
-        cls,
-        type: Literal["BUY", "SELL"],  # noqa: A002
-        limit: int,
-    ) -> dict[float, int]:
+    async def get_latest_fetch_time(cls) -> Optional[datetime]:
         async with jpep_pool.get_conn() as conn:
             cursor = await conn.execute(
-                "SELECT price, SUM(remaining_amount) FROM ftn_macket_records "
-                "JOIN ftn_orders ON ftn_macket_records.id = ftn_orders.id "
-                "WHERE type = %s AND remaining_amount > 0 AND fetch_time = "
-                "(SELECT MAX(fetch_time) FROM ftn_macket_records) "
-                "GROUP BY price ORDER BY price LIMIT %s;",
-                (type, limit),
+                "SELECT MAX(fetch_time) FROM ftn_macket_records;"
             )
 
-            result: dict[float, int] = {}
-            async for item in cursor:
-                result[item[0]] = item[1]
-
-        return result
+            return (await cursor.fetchone())[0]  # type: ignore
 
     @classmethod
-    async def get_price_history(
-        cls,
-        type: Literal["BUY", "SELL"],  # noqa: A002
-        start_time: datetime,
-        resolution: Literal["max", "hour", "day"],
-    ) -> dict[datetime, float]:
-        async with jpep_pool.get_conn() as conn:
-            if type == "BUY":
-                if resolution == "max":
-                    cursor = await conn.execute(
-                        "SELECT fetch_time, MIN(price) FROM ftn_macket_records "
+    async def iter_snapshot_summaries(
+        cls, start_time: Optional[datetime]
+    ) -> AsyncGenerator[tuple[datetime, Literal["BUY", "SELL"], float, float, int]]:
+        async with jpep_pool.get_conn() as conn, conn.transaction():
+            # 首次汇总时需要处理全部历史数据，使用服务端游标分批获取
+            cursor = conn.cursor(name="ftn_macket_snapshot_summaries")
+            cursor.itersize = 5000
+            try:
+                if start_time:
+                    await cursor.execute(
+                        "SELECT fetch_time, type, MIN(price), MAX(price), "
+                        "SUM(remaining_amount) FROM ftn_macket_records "
                         "JOIN ftn_orders ON ftn_macket_records.id = ftn_orders.id "
-                        "WHERE type = 'BUY' AND fetch_time >= %s "
-                        "GROUP BY fetch_time ORDER BY fetch_time;",
+                        "WHERE fetch_time >= %s GROUP BY fetch_time, type "
+                        "ORDER BY fetch_time;",
                         (start_time,),
                     )
                 else:
-                    cursor = await conn.execute(
-                        "SELECT DATE_TRUNC(%s, fetch_time) AS time, MIN(price) "
-                        "FROM ftn_macket_records JOIN ftn_orders "
-                        "ON ftn_macket_records.id = ftn_orders.id WHERE type = 'BUY' "
-                        "AND fetch_time >= %s GROUP BY time ORDER BY time;",
-                        (
-                            resolution,
-                            start_time,
-                        ),
-                    )
-            else:
-                if resolution == "max":
-                    cursor = await conn.execute(
-                        "SELECT fetch_time, MAX(price) FROM ftn_macket_records "
+                    await cursor.execute(
+                        "SELECT fetch_time, type, MIN(price), MAX(price), "
+                        "SUM(remaining_amount) FROM ftn_macket_records "
                         "JOIN ftn_orders ON ftn_macket_records.id = ftn_orders.id "
-                        "WHERE type = 'SELL' AND fetch_time >= %s "
-                        "GROUP BY fetch_time ORDER BY fetch_time;",
-                        (start_time,),
-                    )
-                else:
-                    cursor = await conn.execute(
-                        "SELECT DATE_TRUNC(%s, fetch_time) AS time, MAX(price) "
-                        "FROM ftn_macket_records JOIN ftn_orders "
-                        "ON ftn_macket_records.id = ftn_orders.id WHERE type = 'SELL' "
-                        "AND fetch_time >= %s GROUP BY time ORDER BY time;",
-                        (
-                            resolution,
-                            start_time,
-                        ),
+                        "GROUP BY fetch_time, type ORDER BY fetch_time;"
                     )
 
-            result: dict[datetime, float] = {}
-            async for item in cursor:
-                result[item[0]] = item[1]
-
-        return result
-
-    @classmethod
-    async def get_amount_history(
-        cls,
-        type: Literal["BUY", "SELL"],  # noqa: A002
-        start_time: datetime,
-        resolution: Literal["max", "hour", "day"],
-    ) -> dict[datetime, int]:
-        async with jpep_pool.get_conn() as conn:
-            if resolution == "max":
-                cursor = await conn.execute(
-                    "SELECT fetch_time, SUM(remaining_amount) FROM ftn_macket_records"
-                    " JOIN ftn_orders ON ftn_macket_records.id = ftn_orders.id "
-                    "WHERE type = %s AND fetch_time >= %s GROUP BY fetch_time "
-                    "ORDER BY fetch_time;",
-                    (type, start_time),
-                )
-            else:
-                cursor = await conn.execute(
-                    "SELECT DATE_TRUNC(%s, fetch_time) AS time, AVG(sum)::INTEGER "
-                    "FROM (SELECT fetch_time, SUM(remaining_amount) "
-                    "FROM ftn_macket_records JOIN ftn_orders "
-                    "ON ftn_macket_records.id = ftn_orders.id WHERE type = %s "
-                    "AND fetch_time >= %s GROUP BY fetch_time) "
-                    "GROUP BY time ORDER BY time;",
-                    (
-                        resolution,
-                        type,
-                        start_time,
-                    ),
-                )
-
-            result: dict[datetime, int] = {}
-            async for item in cursor:
-                result[item[0]] = item[1]
-
-        return result
+                async for item in cursor:
+                    yield (item[0], item[1], item[2], item[3], item[4])
+            finally:
+                await cursor.close()
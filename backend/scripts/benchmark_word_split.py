@@ -0,0 +1,102 @@
+# 比较本地分词与远程分词服务的性能，在 backend 目录下运行：
+# python -m scripts.benchmark_word_split [文本文件路径 ...]
+
+from argparse import ArgumentParser
+from asyncio import run as asyncio_run
+from collections import Counter
+from statistics import median, quantiles
+from time import perf_counter
+
+from utils.config import CONFIG
+from utils.word_split import (
+    LocalWordSplitter,
+    RemoteWordSplitter,
+    WordSplitterProtocol,
+)
+
+# 未指定文件时使用的测试文本
+_SAMPLE_TEXT = (
+    "简书是一个创作社区，任何人均可以在其上进行创作。用户在简书上面可以方便地创作自己的作品，"
+    "互相交流。简书成为国内优质原创内容输出平台。写作者在这里记录生活、分享知识，"
+    "读者则通过点赞与评论表达对文章的喜爱，优质文章还有机会登上收益排行榜获得简书贝奖励。"
+) * 20
+
+
+async def benchmark(
+    name: str, splitter: WordSplitterProtocol, texts: list[str], rounds: int
+) -> Counter[str]:
+    # 预热，本地分词首次调用时需要加载词典
+    start_time = perf_counter()
+    words = Counter(await splitter.split(texts[0]))
+    print(f"[{name}] 首次调用耗时 {(perf_counter() - start_time) * 1000:.1f} ms")
+
+    durations: list[float] = []
+    chars_count = 0
+    for _ in range(rounds):
+        for text in texts:
+            start_time = perf_counter()
+            await splitter.split(text)
+            durations.append(perf_counter() - start_time)
+            chars_count += len(text)
+
+    p95 = quantiles(durations, n=20)[-1] if len(durations) > 1 else durations[0]
+    print(
+        f"[{name}] 调用 {len(durations)} 次，"
+        f"P50 {median(durations) * 1000:.1f} ms，P95 {p95 * 1000:.1f} ms，"
+        f"{chars_count / sum(durations):.0f} 字/秒"
+    )
+
+    for text in texts[1:]:
+        words.update(await splitter.split(text))
+    return words
+
+
+async def main(texts: list[str], rounds: int) -> None:
+    results: dict[str, Counter[str]] = {}
+    results["local"] = await benchmark(
+        "local",
+        LocalWordSplitter(
+            dictionary_cache_path=CONFIG.word_split.local_dictionary_cache_path,
+            stopwords_path=CONFIG.word_split.local_stopwords_path,
+        ),
+        texts,
+        rounds,
+    )
+
+    if (
+        CONFIG.word_split_access_key.access_key_id
+        and CONFIG.word_split_access_key.access_key_secret
+    ):
+        results["remote"] = await benchmark(
+            "remote",
+            RemoteWordSplitter(
+                access_key_id=CONFIG.word_split_access_key.access_key_id,
+                access_key_secret=CONFIG.word_split_access_key.access_key_secret,
+            ),
+            texts,
+            rounds,
+        )
+    else:
+        print("[remote] 未设置分词服务凭据，跳过")
+
+    if len(results) == 2:
+        local_top = {x for x, _ in results["local"].most_common(100)}
+        remote_top = {x for x, _ in results["remote"].most_common(100)}
+        print(
+            f"前 100 个高频词重合率 "
+            f"{len(local_top & remote_top) / max(len(remote_top), 1):.0%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="比较本地分词与远程分词服务的性能")
+    parser.add_argument("files", nargs="*", help="测试文本文件路径")
+    parser.add_argument("--rounds", type=int, default=5, help="每个文本的测试轮数")
+    args = parser.parse_args()
+
+    texts: list[str] = []
+    for path in args.files:
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+
+    asyncio_run(main(texts if texts else [_SAMPLE_TEXT], args.rounds))
@@ -0,0 +1,5 @@
+-- date: 2026-10-18
+-- description: 添加贝市数据汇总表权限
+
+GRANT SELECT, INSERT, UPDATE ON TABLE ftn_macket_snapshot_rollups TO jtools;
+GRANT SELECT, INSERT, UPDATE ON TABLE ftn_macket_bucket_rollups TO jtools;
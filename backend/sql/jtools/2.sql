@@ -0,0 +1,4 @@
+-- date: 2026-10-18
+-- description: 添加文章词频缓存表权限
+
+GRANT SELECT, INSERT, UPDATE ON TABLE article_word_freqs TO jtools;
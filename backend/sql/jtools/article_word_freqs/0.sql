@@ -0,0 +1,11 @@
+-- date: 2026-10-18
+-- description: 初始化
+
+CREATE TABLE article_word_freqs (
+    slug VARCHAR(12) NOT NULL,
+    content_hash BYTEA NOT NULL,
+    words TEXT[] NOT NULL,
+    counts INTEGER[] NOT NULL,
+    update_time TIMESTAMP NOT NULL,
+    CONSTRAINT pk_article_word_freqs_slug PRIMARY KEY (slug)
+);
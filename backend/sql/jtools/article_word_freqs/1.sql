@@ -0,0 +1,4 @@
+-- date: 2026-10-18
+-- description: 正文摘要中加入分词后端名称，此前写入的缓存均已失效，清空旧数据
+
+DELETE FROM article_word_freqs;
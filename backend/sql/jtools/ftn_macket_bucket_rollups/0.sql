@@ -0,0 +1,17 @@
+-- date: 2026-10-18
+-- description: 初始化
+
+CREATE TYPE enum_ftn_macket_bucket_rollups_type AS ENUM ('BUY', 'SELL');
+
+CREATE TABLE ftn_macket_bucket_rollups (
+    resolution INTERVAL NOT NULL,
+    type enum_ftn_macket_bucket_rollups_type NOT NULL,
+    bucket_time TIMESTAMP NOT NULL,
+    open_price DOUBLE PRECISION NOT NULL,
+    close_price DOUBLE PRECISION NOT NULL,
+    min_price DOUBLE PRECISION NOT NULL,
+    max_price DOUBLE PRECISION NOT NULL,
+    amount_sum BIGINT NOT NULL,
+    snapshots_count INTEGER NOT NULL,
+    CONSTRAINT pk_ftn_macket_bucket_rollups_resolution_type_bucket_time PRIMARY KEY (resolution, type, bucket_time)
+);
@@ -0,0 +1,17 @@
+-- date: 2026-10-18
+-- description: 为已有快照汇总数据补充 5 分钟粒度汇总
+
+INSERT INTO ftn_macket_bucket_rollups (resolution, type, bucket_time, open_price, close_price, min_price, max_price, amount_sum, snapshots_count)
+SELECT
+    INTERVAL '5 minutes',
+    type::TEXT::enum_ftn_macket_bucket_rollups_type,
+    DATE_BIN(INTERVAL '5 minutes', fetch_time, TIMESTAMP '2000-01-01') AS bucket_time,
+    (ARRAY_AGG(CASE WHEN type = 'BUY' THEN min_price ELSE max_price END ORDER BY fetch_time))[1],
+    (ARRAY_AGG(CASE WHEN type = 'BUY' THEN min_price ELSE max_price END ORDER BY fetch_time DESC))[1],
+    MIN(min_price),
+    MAX(max_price),
+    SUM(amount),
+    COUNT(*)
+FROM ftn_macket_snapshot_rollups
+GROUP BY type, bucket_time
+ON CONFLICT (resolution, type, bucket_time) DO NOTHING;
@@ -0,0 +1,13 @@
+-- date: 2026-10-18
+-- description: 初始化
+
+CREATE TYPE enum_ftn_macket_snapshot_rollups_type AS ENUM ('BUY', 'SELL');
+
+CREATE TABLE ftn_macket_snapshot_rollups (
+    fetch_time TIMESTAMP NOT NULL,
+    type enum_ftn_macket_snapshot_rollups_type NOT NULL,
+    min_price DOUBLE PRECISION NOT NULL,
+    max_price DOUBLE PRECISION NOT NULL,
+    amount INTEGER NOT NULL,
+    CONSTRAINT pk_ftn_macket_snapshot_rollups_fetch_time_type PRIMARY KEY (fetch_time, type)
+);
@@ -0,0 +1,150 @@
+from datetime import date, timedelta
+from random import Random
+from typing import Optional
+
+import pytest
+
+from utils.lp_recommend_rule import get_earliest_can_recommend_date
+
+# 上榜记录 (日期, 排名, 文章 Slug)
+Record = tuple[date, int, Optional[str]]
+
+_START_DATE = date(2024, 1, 1)
+
+
+# 原有实现，逐条查询上一条上榜记录，此处以内存中的记录模拟两次查询
+class _BaselineWalk:
+    def __init__(self, records: list[Record]) -> None:
+        # 与原有 SQL 一致：排名不低于 85 名，按日期与排名降序排列
+        self._records = sorted(
+            (x for x in records if x[1] <= 85),
+            key=lambda x: (x[0], x[1]),
+            reverse=True,
+        )
+
+    def get_latest_record(self) -> Optional[Record]:
+        return self._records[0] if self._records else None
+
+    def get_pervious_record(self, base_record: Record) -> Optional[Record]:
+        for record in self._records:
+            if record[0] < base_record[0] or (
+                record[0] == base_record[0] and record[1] < base_record[1]
+            ):
+                return record
+
+        return None
+
+    def get_earliest_can_recommend_date(self) -> Optional[date]:
+        counted_article_slugs = set()
+
+        latest_onrank_record = self.get_latest_record()
+        if not latest_onrank_record:
+            return None
+
+        interval_days = 10 if latest_onrank_record[1] <= 30 else 7
+        counted_article_slugs.add(latest_onrank_record[2])
+
+        now_record = latest_onrank_record
+        while True:
+            pervious_record = self.get_pervious_record(now_record)
+            if not pervious_record:
+                return latest_onrank_record[0] + timedelta(days=interval_days)
+            if pervious_record[2] in counted_article_slugs:
+                now_record = pervious_record
+                continue
+
+            counted_article_slugs.add(pervious_record[2])
+
+            if (
+                now_record[1] <= 30
+                and (now_record[0] - pervious_record[0]).days + 1 >= 10
+            ) or (
+                now_record[1] > 30
+                and (now_record[0] - pervious_record[0]).days + 1 >= 7
+            ):
+                return latest_onrank_record[0] + timedelta(days=interval_days)
+
+            if pervious_record[1] <= 30:
+                interval_days += 10
+            else:
+                interval_days += 7
+
+            now_record = pervious_record
+
+
+def _get_ranking_history(records: list[Record]) -> list[Record]:
+    # 与 ArticleEarningRankingRecord.iter_all_ranking_history 的查询条件一致
+    return sorted(
+        (x for x in records if x[1] <= 85),
+        key=lambda x: (x[0], x[1]),
+        reverse=True,
+    )
+
+
+def _random_history(rng: Random) -> list[Record]:
+    slugs: list[Optional[str]] = [f"article{i}" for i in range(rng.randint(1, 12))]
+    # 已删除文章的 Slug 为空
+    slugs.append(None)
+
+    records: dict[tuple[date, int], Record] = {}
+    now_date = _START_DATE
+    for _ in range(rng.randint(0, 40)):
+        # 连续上榜、同日多次上榜、恰好在间隔边界上以及长时间未上榜
+        now_date += timedelta(days=rng.choice((0, 0, 1, 1, 5, 6, 7, 8, 9, 10, 11, 60)))
+        # 包括 30 / 85 名附近的边界排名
+        ranking = rng.choice((1, 29, 30, 31, 50, 84, 85, 86, 100, rng.randint(1, 100)))
+        # 同一日期与排名只有一条记录
+        records[(now_date, ranking)] = (now_date, ranking, rng.choice(slugs))
+
+    return list(records.values())
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_baseline_on_random_histories(seed: int) -> None:
+    rng = Random(seed)
+    for _ in range(500):
+        records = _random_history(rng)
+
+        assert (
+            get_earliest_can_recommend_date(_get_ranking_history(records))
+            == _BaselineWalk(records).get_earliest_can_recommend_date()
+        )
+
+
+@pytest.mark.parametrize(
+    "records",
+    [
+        # 没有上榜记录
+        [],
+        # 仅有 85 名以外的上榜记录
+        [(date(2024, 1, 1), 86, "a")],
+        # 单条记录，30 名与 31 名
+        [(date(2024, 1, 1), 30, "a")],
+        [(date(2024, 1, 1), 31, "a")],
+        # 前 30 名间隔 9 / 10 天
+        [(date(2024, 1, 10), 30, "a"), (date(2024, 1, 2), 30, "b")],
+        [(date(2024, 1, 10), 30, "a"), (date(2024, 1, 1), 30, "b")],
+        # 30 名以外间隔 6 / 7 天
+        [(date(2024, 1, 7), 31, "a"), (date(2024, 1, 2), 31, "b")],
+        [(date(2024, 1, 7), 31, "a"), (date(2024, 1, 1), 31, "b")],
+        # 同一文章多次上榜，只计算一次
+        [
+            (date(2024, 1, 10), 20, "a"),
+            (date(2024, 1, 9), 20, "a"),
+            (date(2024, 1, 8), 40, "b"),
+        ],
+        # 同一日期多次上榜
+        [
+            (date(2024, 1, 10), 85, "a"),
+            (date(2024, 1, 10), 31, "b"),
+            (date(2024, 1, 10), 1, "c"),
+        ],
+        # 已删除文章
+        [(date(2024, 1, 10), 10, None), (date(2024, 1, 9), 10, None)],
+    ],
+)
+def test_matches_baseline_on_boundaries(records: list[Record]) -> None:
+    assert (
+        get_earliest_can_recommend_date(_get_ranking_history(records))
+        == _BaselineWalk(records).get_earliest_can_recommend_date()
+    )
@@ -0,0 +1,5 @@
+from utils.sse import HEARTBEAT_MESSAGE
+
+
+def test_heartbeat_is_comment_only() -> None:
+    assert HEARTBEAT_MESSAGE.encode() == b": heartbeat\r\n\r\n"
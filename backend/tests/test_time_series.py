@@ -0,0 +1,16 @@
+from datetime import datetime, timedelta, timezone
+
+from utils.time_series import to_data_time
+
+
+def test_to_data_time_keeps_naive_time() -> None:
+    assert to_data_time(datetime(2024, 1, 1, 8)) == datetime(2024, 1, 1, 8)
+
+
+def test_to_data_time_converts_aware_time_to_beijing_time() -> None:
+    assert to_data_time(datetime(2024, 1, 1, tzinfo=timezone.utc)) == datetime(
+        2024, 1, 1, 8
+    )
+    assert to_data_time(
+        datetime(2024, 1, 1, 8, tzinfo=timezone(timedelta(hours=-5)))
+    ) == datetime(2024, 1, 1, 21)
@@ -0,0 +1,126 @@
+from asyncio import Lock, Task, create_task, shield
+from collections import OrderedDict
+from collections.abc import Awaitable
+from time import monotonic
+from typing import Callable, Generic, Optional, TypeVar, Union
+
+from utils.log import logger
+
+T = TypeVar("T")
+K = TypeVar("K")
+V = TypeVar("V")
+
+# 刷新失败后重试的最小间隔（秒），避免上游故障时每次请求都触发刷新
+_REFRESH_RETRY_INTERVAL = 30
+
+
+class StaleWhileRevalidateCache(Generic[T]):
+    def __init__(self, loader: Callable[[], Awaitable[T]], ttl: float) -> None:
+        self._loader = loader
+        self._ttl = ttl
+
+        self._value: Optional[T] = None
+        self._expire_time: float = 0
+        self._lock = Lock()
+        self._refresh_task: Optional[Task[None]] = None
+
+    async def _refresh(self) -> None:
+        try:
+            value = await self._loader()
+        except Exception as e:  # noqa: BLE001
+            # 刷新失败时继续使用上一次成功获取的数据
+            logger.warn("刷新缓存失败，继续使用过期数据", exception=e)
+            self._expire_time = monotonic() + min(self._ttl, _REFRESH_RETRY_INTERVAL)
+        else:
+            self._value = value
+            self._expire_time = monotonic() + self._ttl
+        finally:
+            self._refresh_task = None
+
+    async def get(self) -> T:
+        if self._value is None:
+            # 首次获取时没有可用的数据，需要等待加载完成，失败时抛出异常
+            async with self._lock:
+                if self._value is None:
+                    self._value = await self._loader()
+                    self._expire_time = monotonic() + self._ttl
+
+            return self._value
+
+        # 数据过期时先返回旧数据，同时在后台刷新，同一时间只运行一个刷新任务
+        if monotonic() >= self._expire_time and not self._refresh_task:
+            self._refresh_task = create_task(self._refresh())
+
+        return self._value
+
+
+class LRUCache(Generic[K, V]):
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._data: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> Optional[V]:
+        if key not in self._data:
+            return None
+
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key: K, value: V) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+        # 超出容量时淘汰最久未使用的数据
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+
+class SingleFlightTTLCache(Generic[K, V]):
+    def __init__(
+        self,
+        loader: Callable[[K], Awaitable[V]],
+        ttl: float,
+        maxsize: int,
+        negative_ttl: float = 0,
+        negative_exceptions: tuple[type[Exception], ...] = (),
+    ) -> None:
+        self._loader = loader
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._negative_exceptions = negative_exceptions
+
+        # 键 -> (过期时间, 数据或加载时抛出的异常)
+        self._data: LRUCache[K, tuple[float, Union[V, Exception]]] = LRUCache(
+            maxsize=maxsize
+        )
+        self._loading_tasks: dict[K, Task[V]] = {}
+
+    async def _load(self, key: K) -> V:
+        try:
+            value = await self._loader(key)
+        except self._negative_exceptions as e:
+            # 缓存可预期的异常，避免重复请求不存在的资源
+            self._data.set(key, (monotonic() + self._negative_ttl, e))
+            raise
+        finally:
+            del self._loading_tasks[key]
+
+        self._data.set(key, (monotonic() + self._ttl, value))
+        return value
+
+    async def get(self, key: K) -> V:
+        item = self._data.get(key)
+        if item and monotonic() < item[0]:
+            if isinstance(item[1], Exception):
+                raise item[1].with_traceback(None)
+            return item[1]
+
+        # 同一个键同一时间只运行一个加载任务，其余请求等待该任务完成
+        task = self._loading_tasks.get(key)
+        if not task:
+            task = self._loading_tasks[key] = create_task(self._load(key))
+
+        # 单个请求被取消时不影响其它等待中的请求
+        return await shield(task)
@@ -1,10 +1,35 @@
+from typing import Literal, Optional
+
+from msgspec import field
 from sshared.config import ConfigBase
 from sshared.config.blocks import (
     AliyunAccessKeyBlock,
+    ConfigBlock,
     LoggingBlock,
     PostgresBlock,
     UvicornBlock,
 )
+from sshared.strict_struct import PositiveInt
+
+
+class _CacheBlock(ConfigBlock, frozen=True):
+    # 贝市交易配置缓存有效期（秒）
+    platform_settings_ttl: PositiveInt = 600
+    # 用户会员信息缓存有效期（秒）
+    vip_info_ttl: PositiveInt = 600
+    # 用户不存在或已注销 / 被封禁时的缓存有效期（秒）
+    vip_info_negative_ttl: PositiveInt = 60
+
+
+class _WordSplitBlock(ConfigBlock, frozen=True):
+    # remote 为阿里云分词服务，local 为本地词典分词，需要安装 local-word-split 依赖组
+    backend: Literal["remote", "local"] = "remote"
+    # 本地分词预编译词典的保存路径，多个进程与重启后均可直接加载
+    local_dictionary_cache_path: str = "word_split_dictionary.cache"
+    # 额外的停用词文件路径，每行一个词
+    local_stopwords_path: Optional[str] = None
+    # 本地分词使用的进程数，大于 1 时长文章的各文本块在进程池中并行分词
+    local_processes: PositiveInt = 1
 
 
 class _Config(ConfigBase, frozen=True):
@@ -14,6 +39,8 @@ class _Config(ConfigBase, frozen=True):
     logging: LoggingBlock
     uvicorn: UvicornBlock
     word_split_access_key: AliyunAccessKeyBlock
+    word_split: _WordSplitBlock = field(default_factory=_WordSplitBlock)
+    cache: _CacheBlock = field(default_factory=_CacheBlock)
 
 
 CONFIG = _Config.load_from_file("config.toml")
@@ -0,0 +1,61 @@
+from datetime import datetime
+from typing import Optional, TypeVar
+
+import numpy as np
+
+T = TypeVar("T", int, float)
+
+
+# Largest-Triangle-Three-Buckets 降采样，返回保留的数据点下标
+def _lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    n = len(x)
+
+    # 首尾两点固定保留，其余数据点均分为 threshold - 2 个桶
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    # 利用前缀和一次性计算每个桶的平均点
+    x_cumsum = np.concatenate(([0.0], np.cumsum(x)))
+    y_cumsum = np.concatenate(([0.0], np.cumsum(y)))
+    bucket_sizes = edges[1:] - edges[:-1]
+    x_avg = (x_cumsum[edges[1:]] - x_cumsum[edges[:-1]]) / bucket_sizes
+    y_avg = (y_cumsum[edges[1:]] - y_cumsum[edges[:-1]]) / bucket_sizes
+    # 每个桶参考下一个桶的平均点，最后一个桶参考最后一个数据点
+    next_x = np.append(x_avg[1:], x[-1])
+    next_y = np.append(y_avg[1:], y[-1])
+
+    result = np.empty(threshold, dtype=np.int64)
+    result[0] = 0
+    result[-1] = n - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        ax, ay = x[selected], y[selected]
+        # 与上一个选中点、下一个桶平均点构成的三角形面积（省略常数系数）
+        areas = np.abs(
+            (ax - next_x[i]) * (y[start:end] - ay)
+            - (ax - x[start:end]) * (next_y[i] - ay)
+        )
+        selected = start + int(np.argmax(areas))
+        result[i + 1] = selected
+
+    return result
+
+
+def lttb_downsample(
+    history: dict[datetime, T], max_points: Optional[int]
+) -> dict[datetime, T]:
+    if not max_points or len(history) <= max_points:
+        return history
+
+    times = list(history.keys())
+    values = list(history.values())
+    x = np.fromiter(
+        (item.timestamp() for item in times), dtype=np.float64, count=len(times)
+    )
+    y = np.asarray(values, dtype=np.float64)
+
+    return {
+        times[index]: values[index]
+        for index in _lttb_indices(x, y, max_points).tolist()
+    }
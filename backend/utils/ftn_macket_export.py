@@ -0,0 +1,145 @@
+from collections.abc import AsyncGenerator, AsyncIterator
+from csv import writer as csv_writer
+from datetime import datetime, timedelta
+from importlib.util import find_spec
+from io import BytesIO, StringIO
+from typing import Literal
+
+from msgspec import Struct
+from msgspec.json import Encoder
+
+from models.ftn_macket_bucket_rollup import FTNMacketBucketRollup
+
+ExportFormat = Literal["csv", "ndjson", "arrow"]
+
+EXPORT_MEDIA_TYPES: dict[str, str] = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# 每次查询与写入响应的行数
+_CHUNK_SIZE = 1000
+
+_FIELDS: tuple[str, ...] = (
+    "time",
+    "type",
+    "open_price",
+    "close_price",
+    "min_price",
+    "max_price",
+    "amount",
+    "snapshots_count",
+)
+
+_Row = tuple[datetime, Literal["BUY", "SELL"], float, float, float, float, int, int]
+
+
+class _ExportRow(Struct, frozen=True):
+    time: datetime
+    type: Literal["BUY", "SELL"]
+    open_price: float
+    close_price: float
+    min_price: float
+    max_price: float
+    amount: int
+    snapshots_count: int
+
+
+def is_arrow_available() -> bool:
+    return find_spec("pyarrow") is not None
+
+
+# 每页单独获取数据库连接，避免下载较慢时长时间占用连接
+async def _iter_chunks(
+    resolution: timedelta, start_time: datetime, end_time: datetime
+) -> AsyncGenerator[list[_Row]]:
+    after = None
+    while True:
+        chunk = await FTNMacketBucketRollup.get_by_time_range(
+            resolution=resolution,
+            start_time=start_time,
+            end_time=end_time,
+            limit=_CHUNK_SIZE,
+            after=after,
+        )
+        if chunk:
+            yield chunk
+        if len(chunk) < _CHUNK_SIZE:
+            return
+
+        after = (chunk[-1][0], chunk[-1][1])
+
+
+async def _encode_csv(chunks: AsyncIterator[list[_Row]]) -> AsyncGenerator[bytes]:
+    buffer = StringIO()
+    writer = csv_writer(buffer)
+
+    writer.writerow(_FIELDS)
+    async for chunk in chunks:
+        writer.writerows((item[0].isoformat(), *item[1:]) for item in chunk)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    # 没有数据时仍输出表头
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def _encode_ndjson(chunks: AsyncIterator[list[_Row]]) -> AsyncGenerator[bytes]:
+    encoder = Encoder()
+
+    async for chunk in chunks:
+        yield encoder.encode_lines([_ExportRow(*item) for item in chunk])
+
+
+async def _encode_arrow(chunks: AsyncIterator[list[_Row]]) -> AsyncGenerator[bytes]:
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [
+            ("time", pa.timestamp("us")),
+            ("type", pa.string()),
+            ("open_price", pa.float64()),
+            ("close_price", pa.float64()),
+            ("min_price", pa.float64()),
+            ("max_price", pa.float64()),
+            ("amount", pa.int64()),
+            ("snapshots_count", pa.int64()),
+        ]
+    )
+    buffer = BytesIO()
+
+    def flush() -> bytes:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    with pa.ipc.new_stream(buffer, schema) as writer:
+        yield flush()
+        async for chunk in chunks:
+            writer.write_batch(
+                pa.record_batch([list(column) for column in zip(*chunk)], schema=schema)
+            )
+            yield flush()
+
+    # 流结束标记
+    yield flush()
+
+
+def export_ftn_macket_history(
+    format: ExportFormat,  # noqa: A002
+    resolution: timedelta,
+    start_time: datetime,
+    end_time: datetime,
+) -> AsyncGenerator[bytes]:
+    chunks = _iter_chunks(resolution, start_time, end_time)
+
+    if format == "csv":
+        return _encode_csv(chunks)
+    if format == "ndjson":
+        return _encode_ndjson(chunks)
+
+    return _encode_arrow(chunks)
@@ -0,0 +1,137 @@
+from asyncio import Lock
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+
+from sshared.time import get_datetime_before_now
+
+from models.ftn_macket_bucket_rollup import FTNMacketBucketRollup
+from utils.ftn_macket_rollup import ROLLUP_RESOLUTIONS, sync_ftn_macket_rollups
+
+# 历史数据接口支持的最大时间范围
+_MAX_RANGE = timedelta(days=30)
+# 与 SQL 中 DATE_BIN 使用的起点保持一致
+_BUCKET_ORIGIN = datetime(2000, 1, 1)
+
+
+def _bin_time(time: datetime, resolution: timedelta) -> datetime:
+    return _BUCKET_ORIGIN + (time - _BUCKET_ORIGIN) // resolution * resolution
+
+
+class _FTNMacketHistorySeries:
+    def __init__(self, resolution: timedelta) -> None:
+        self._resolution = resolution
+        # 元素为 (时间段, 价格, 挂单量)，按时间段升序排列
+        self._buckets: dict[str, deque[tuple[datetime, float, int]]] = {
+            "BUY": deque(),
+            "SELL": deque(),
+        }
+        self._last_seen_fetch_time: Optional[datetime] = None
+        self._lock = Lock()
+
+    def _evict(self) -> None:
+        start_time = _bin_time(get_datetime_before_now(_MAX_RANGE), self._resolution)
+        for buckets in self._buckets.values():
+            while buckets and buckets[0][0] < start_time:
+                buckets.popleft()
+
+    async def _update(self, latest_fetch_time: datetime) -> None:
+        last_bucket_times = [
+            buckets[-1][0] for buckets in self._buckets.values() if buckets
+        ]
+        # 最后一个时间段可能尚未结束，需要与之后的时间段一同重新获取
+        start_time = (
+            min(last_bucket_times)
+            if last_bucket_times
+            else get_datetime_before_now(_MAX_RANGE)
+        )
+
+        async for time, type_, price, amount in FTNMacketBucketRollup.iter_history(
+            start_time=start_time, resolution=self._resolution
+        ):
+            buckets = self._buckets[type_]
+            if buckets:
+                # 从两种类型中较早的时间段开始获取，跳过该类型已有的时间段，
+                # 保持时间段升序且不重复
+                if time < buckets[-1][0]:
+                    continue
+                if time == buckets[-1][0]:
+                    buckets.pop()
+            buckets.append((time, price, amount))
+
+        self._last_seen_fetch_time = latest_fetch_time
+
+    async def update(self) -> None:
+        latest_fetch_time = await sync_ftn_macket_rollups()
+
+        async with self._lock:
+            if latest_fetch_time and latest_fetch_time != self._last_seen_fetch_time:
+                await self._update(latest_fetch_time)
+            self._evict()
+
+    def read(
+        self,
+        type: Literal["BUY", "SELL"],  # noqa: A002
+        start_time: datetime,
+    ) -> tuple[dict[datetime, float], dict[datetime, int]]:
+        start_time = _bin_time(start_time, self._resolution)
+        price_history: dict[datetime, float] = {}
+        amount_history: dict[datetime, int] = {}
+        # 从最新的时间段开始向前查找，避免遍历超出时间范围的数据
+        for time, price, amount in reversed(self._buckets[type]):
+            if time < start_time:
+                break
+            price_history[time] = price
+            amount_history[time] = amount
+
+        return (
+            dict(reversed(price_history.items())),
+            dict(reversed(amount_history.items())),
+        )
+
+
+class FTNMacketHistoryCache:
+    def __init__(self) -> None:
+        self._series = {
+            resolution: _FTNMacketHistorySeries(resolution)
+            for resolution in ROLLUP_RESOLUTIONS
+        }
+
+    async def get_price_history(
+        self,
+        type: Literal["BUY", "SELL"],  # noqa: A002
+        start_time: datetime,
+        resolution: timedelta,
+    ) -> dict[datetime, float]:
+        series = self._series[resolution]
+        await series.update()
+
+        return series.read(type, start_time)[0]
+
+    async def get_amount_history(
+        self,
+        type: Literal["BUY", "SELL"],  # noqa: A002
+        start_time: datetime,
+        resolution: timedelta,
+    ) -> dict[datetime, int]:
+        series = self._series[resolution]
+        await series.update()
+
+        return series.read(type, start_time)[1]
+
+    # 返回两种交易单的 (价格, 挂单量) 历史数据
+    async def get_history(
+        self, start_time: datetime, resolution: timedelta
+    ) -> dict[
+        Literal["BUY", "SELL"], tuple[dict[datetime, float], dict[datetime, int]]
+    ]:
+        series = self._series[resolution]
+        await series.update()
+
+        return {
+            "BUY": series.read("BUY", start_time),
+            "SELL": series.read("SELL", start_time),
+        }
+
+
+FTN_MACKET_HISTORY_CACHE = FTNMacketHistoryCache()
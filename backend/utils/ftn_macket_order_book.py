@@ -0,0 +1,101 @@
+from typing import Literal, Optional
+
+import numpy as np
+
+from utils.ftn_macket_snapshot import FTNMacketSnapshot, FTNMacketSnapshotSide
+
+
+class FTNMacketOrderBookSide:
+    def __init__(
+        self,
+        type: Literal["BUY", "SELL"],  # noqa: A002
+        side: FTNMacketSnapshotSide,
+    ) -> None:
+        prices = np.fromiter(
+            side.amount_distribution.keys(),
+            dtype=np.float64,
+            count=len(side.amount_distribution),
+        )
+        amounts = np.fromiter(
+            side.amount_distribution.values(),
+            dtype=np.int64,
+            count=len(side.amount_distribution),
+        )
+        # 挂单分布按价格升序排列，买单从最低价开始成交，卖单从最高价开始成交
+        if type == "SELL":
+            prices = prices[::-1]
+            amounts = amounts[::-1]
+
+        self.prices = prices
+        self.cumulative_amounts = np.cumsum(amounts)
+        self.cumulative_notionals = np.cumsum(prices * amounts)
+
+    @property
+    def best_price(self) -> Optional[float]:
+        return float(self.prices[0]) if len(self.prices) else None
+
+    @property
+    def total_amount(self) -> int:
+        return int(self.cumulative_amounts[-1]) if len(self.prices) else 0
+
+    # 按最优价格依次成交 quantity 个简书贝的成交均价，挂单量不足时返回 None
+    def get_vwap(self, quantity: int) -> Optional[float]:
+        if quantity > self.total_amount:
+            return None
+
+        # 最后一个需要成交的价格档位
+        index = int(np.searchsorted(self.cumulative_amounts, quantity))
+        filled_amount = int(self.cumulative_amounts[index - 1]) if index else 0
+        filled_notional = float(self.cumulative_notionals[index - 1]) if index else 0.0
+        notional = filled_notional + float(self.prices[index]) * (
+            quantity - filled_amount
+        )
+
+        return notional / quantity
+
+    # 成交均价相对最优价格的偏离比例，挂单量不足时返回 None
+    def get_slippage(self, quantity: int) -> Optional[float]:
+        vwap = self.get_vwap(quantity)
+        best_price = self.best_price
+        if vwap is None or best_price is None:
+            return None
+
+        return abs(vwap - best_price) / best_price
+
+
+class FTNMacketOrderBook:
+    def __init__(self, snapshot: FTNMacketSnapshot) -> None:
+        self.fetch_time = snapshot.fetch_time
+        self.buy = FTNMacketOrderBookSide("BUY", snapshot.buy)
+        self.sell = FTNMacketOrderBookSide("SELL", snapshot.sell)
+
+    @property
+    def spread(self) -> Optional[float]:
+        if self.buy.best_price is None or self.sell.best_price is None:
+            return None
+
+        return self.buy.best_price - self.sell.best_price
+
+    @property
+    def mid_price(self) -> Optional[float]:
+        if self.buy.best_price is None or self.sell.best_price is None:
+            return None
+
+        return (self.buy.best_price + self.sell.best_price) / 2
+
+
+class FTNMacketOrderBookCache:
+    def __init__(self) -> None:
+        self._snapshot: Optional[FTNMacketSnapshot] = None
+        self._order_book: Optional[FTNMacketOrderBook] = None
+
+    # 每个快照只构建一次挂单簿，写入未完成时重新加载的快照同样需要重新构建
+    def get(self, snapshot: FTNMacketSnapshot) -> FTNMacketOrderBook:
+        if not self._order_book or self._snapshot is not snapshot:
+            self._snapshot = snapshot
+            self._order_book = FTNMacketOrderBook(snapshot)
+
+        return self._order_book
+
+
+FTN_MACKET_ORDER_BOOK_CACHE = FTNMacketOrderBookCache()
@@ -0,0 +1,79 @@
+from asyncio import Lock, Task, create_task
+from datetime import datetime, timedelta
+from typing import Optional
+
+from models.ftn_macket_bucket_rollup import FTNMacketBucketRollup
+from models.ftn_macket_snapshot_rollup import FTNMacketSnapshotRollup
+from models.jpep.ftn_macket_record import FTNMacketRecord
+from utils.log import logger
+
+ROLLUP_RESOLUTIONS: tuple[timedelta, ...] = (
+    timedelta(minutes=5),
+    timedelta(hours=1),
+    timedelta(days=1),
+)
+
+_BATCH_SIZE = 1000
+
+_sync_lock = Lock()
+_warm_up_task: Optional[Task[None]] = None
+
+
+async def _flush(batch: list[FTNMacketSnapshotRollup]) -> None:
+    await FTNMacketSnapshotRollup.create_many(batch)
+    for resolution in ROLLUP_RESOLUTIONS:
+        await FTNMacketBucketRollup.refresh(resolution, start_time=batch[0].fetch_time)
+
+
+# 返回已汇总的最新一次快照的时间
+async def sync_ftn_macket_rollups() -> Optional[datetime]:
+    async with _sync_lock:
+        latest_fetch_time = await FTNMacketRecord.get_latest_fetch_time()
+        if not latest_fetch_time:  # 数据库中没有数据
+            return None
+
+        rolled_fetch_time = await FTNMacketSnapshotRollup.get_latest_fetch_time()
+        if rolled_fetch_time and rolled_fetch_time >= latest_fetch_time:
+            return rolled_fetch_time
+
+        # 从已汇总的最新一次快照开始重新汇总，避免遗漏其写入未完成时的数据
+        batch: list[FTNMacketSnapshotRollup] = []
+        async for (
+            fetch_time,
+            type_,
+            min_price,
+            max_price,
+            amount,
+        ) in FTNMacketRecord.iter_snapshot_summaries(start_time=rolled_fetch_time):
+            batch.append(
+                FTNMacketSnapshotRollup(
+                    fetch_time=fetch_time,
+                    type=type_,
+                    min_price=min_price,
+                    max_price=max_price,
+                    amount=amount,
+                )
+            )
+
+            if len(batch) >= _BATCH_SIZE:
+                await _flush(batch)
+                batch = []
+
+        if batch:
+            await _flush(batch)
+
+        return latest_fetch_time
+
+
+async def _warm_up() -> None:
+    try:
+        await sync_ftn_macket_rollups()
+    except Exception as e:  # noqa: BLE001
+        logger.error("汇总贝市快照失败", exception=e)
+
+
+# 在后台完成首次汇总，避免由历史数据请求触发全量回填
+def start_ftn_macket_rollup_sync() -> None:
+    global _warm_up_task
+    if not _warm_up_task:
+        _warm_up_task = create_task(_warm_up())
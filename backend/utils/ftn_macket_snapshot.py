@@ -0,0 +1,115 @@
+from asyncio import Lock
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Literal, Optional
+
+from msgspec import Struct
+from sshared.time import get_datetime_before_now
+
+from models.jpep.ftn_macket_record import FTNMacketRecord
+
+# 两次检查是否有新快照的最小间隔（秒），用于合并页面加载时的并发请求
+_LATEST_FETCH_TIME_CHECK_INTERVAL = 10
+# 快照开始写入后可能需要一段时间才能写入完成，在此期间每次检查时重新加载
+_INGEST_WINDOW = timedelta(minutes=1)
+
+
+class FTNMacketSnapshotSide(Struct, frozen=True):
+    price: Optional[float]
+    amount: Optional[int]
+    # 按价格升序排列
+    amount_distribution: dict[float, int]
+
+
+EMPTY_SNAPSHOT_SIDE = FTNMacketSnapshotSide(
+    price=None, amount=None, amount_distribution={}
+)
+
+
+class FTNMacketSnapshot(Struct, frozen=True):
+    fetch_time: datetime
+    buy: FTNMacketSnapshotSide
+    sell: FTNMacketSnapshotSide
+
+    def get_side(self, type: Literal["BUY", "SELL"]) -> FTNMacketSnapshotSide:  # noqa: A002
+        return self.buy if type == "BUY" else self.sell
+
+
+def _build_side(
+    type: Literal["BUY", "SELL"],  # noqa: A002
+    orders: list[tuple[float, int]],
+) -> FTNMacketSnapshotSide:
+    if not orders:
+        return EMPTY_SNAPSHOT_SIDE
+
+    amount_distribution: dict[float, int] = {}
+    for price, remaining_amount in orders:
+        if remaining_amount <= 0:
+            continue
+        amount_distribution[price] = (
+            amount_distribution.get(price, 0) + remaining_amount
+        )
+    amount_distribution = dict(sorted(amount_distribution.items()))
+
+    if not amount_distribution:
+        price = None
+    elif type == "BUY":
+        price = next(iter(amount_distribution))
+    else:
+        price = next(reversed(amount_distribution))
+
+    return FTNMacketSnapshotSide(
+        price=price,
+        amount=sum(remaining_amount for _, remaining_amount in orders),
+        amount_distribution=amount_distribution,
+    )
+
+
+async def _load_snapshot(fetch_time: datetime) -> FTNMacketSnapshot:
+    orders: dict[str, list[tuple[float, int]]] = {"BUY": [], "SELL": []}
+    async for (
+        type_,
+        price,
+        remaining_amount,
+    ) in FTNMacketRecord.iter_orders_by_fetch_time(fetch_time):
+        orders[type_].append((price, remaining_amount))
+
+    return FTNMacketSnapshot(
+        fetch_time=fetch_time,
+        buy=_build_side("BUY", orders["BUY"]),
+        sell=_build_side("SELL", orders["SELL"]),
+    )
+
+
+class FTNMacketSnapshotCache:
+    def __init__(self) -> None:
+        self._snapshot: Optional[FTNMacketSnapshot] = None
+        self._last_check_time: float = 0
+        self._lock = Lock()
+
+    async def get(self) -> Optional[FTNMacketSnapshot]:
+        async with self._lock:
+            if (
+                self._snapshot
+                and monotonic() - self._last_check_time
+                < _LATEST_FETCH_TIME_CHECK_INTERVAL
+            ):
+                return self._snapshot
+
+            latest_fetch_time = await FTNMacketRecord.get_latest_fetch_time()
+            self._last_check_time = monotonic()
+            if not latest_fetch_time:  # 数据库中没有数据
+                return None
+
+            # 快照写入完成后不会再变化，此后仅在出现新快照时重新加载
+            if (
+                not self._snapshot
+                or self._snapshot.fetch_time != latest_fetch_time
+                or latest_fetch_time > get_datetime_before_now(_INGEST_WINDOW)
+            ):
+                self._snapshot = await _load_snapshot(latest_fetch_time)
+
+            return self._snapshot
+
+
+FTN_MACKET_SNAPSHOT_CACHE = FTNMacketSnapshotCache()
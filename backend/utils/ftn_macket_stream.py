@@ -0,0 +1,77 @@
+from asyncio import Queue, QueueEmpty, Task, TimeoutError, create_task, sleep, wait_for
+from collections.abc import AsyncGenerator
+from contextlib import suppress
+from typing import Optional
+
+from utils.ftn_macket_snapshot import FTN_MACKET_SNAPSHOT_CACHE, FTNMacketSnapshot
+from utils.log import logger
+
+# 检查是否有新快照的间隔（秒），快照缓存自身也会合并此间隔内的检查
+_WATCH_INTERVAL = 10
+# 没有新快照时发送心跳的间隔（秒），避免连接被代理服务器断开
+_HEARTBEAT_INTERVAL = 30
+
+
+class FTNMacketSnapshotBroadcaster:
+    def __init__(self) -> None:
+        self._subscribers: set[Queue[FTNMacketSnapshot]] = set()
+        self._latest_snapshot: Optional[FTNMacketSnapshot] = None
+        self._watcher: Optional[Task[None]] = None
+
+    @staticmethod
+    def _put_latest(
+        queue: Queue[FTNMacketSnapshot], snapshot: FTNMacketSnapshot
+    ) -> None:
+        # 订阅者消费过慢时丢弃未读取的旧快照，只保留最新一次
+        with suppress(QueueEmpty):
+            queue.get_nowait()
+        queue.put_nowait(snapshot)
+
+    @staticmethod
+    async def _get_or_heartbeat(
+        queue: Queue[FTNMacketSnapshot],
+    ) -> Optional[FTNMacketSnapshot]:
+        try:
+            return await wait_for(queue.get(), timeout=_HEARTBEAT_INTERVAL)
+        except TimeoutError:
+            return None
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                snapshot = await FTN_MACKET_SNAPSHOT_CACHE.get()
+            except Exception as e:  # noqa: BLE001
+                logger.error("获取贝市快照失败", exception=e)
+                snapshot = None
+
+            # 最新一次快照写入完成前可能被多次重新加载，内容变化时同样推送
+            if snapshot and snapshot != self._latest_snapshot:
+                self._latest_snapshot = snapshot
+                for queue in self._subscribers:
+                    self._put_latest(queue, snapshot)
+
+            await sleep(_WATCH_INTERVAL)
+
+            # 没有订阅者时停止检查，下次订阅时重新启动
+            if not self._subscribers:
+                self._watcher = None
+                return
+
+    # 产出 None 表示心跳
+    async def subscribe(self) -> AsyncGenerator[Optional[FTNMacketSnapshot]]:
+        queue: Queue[FTNMacketSnapshot] = Queue(maxsize=1)
+        if self._latest_snapshot:
+            queue.put_nowait(self._latest_snapshot)
+        self._subscribers.add(queue)
+
+        if not self._watcher:
+            self._watcher = create_task(self._watch())
+
+        try:
+            while True:
+                yield await self._get_or_heartbeat(queue)
+        finally:
+            self._subscribers.discard(queue)
+
+
+FTN_MACKET_SNAPSHOT_BROADCASTER = FTNMacketSnapshotBroadcaster()
@@ -0,0 +1,206 @@
+from asyncio import Lock
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime, timedelta
+from sys import intern
+from time import monotonic
+from typing import Optional
+
+from sspeedup.time_helper import get_start_time
+
+from models.jianshu.lottery_win_record import REWARD_NAMES, LotteryWinRecord
+
+# 两次检查是否有新中奖记录的最小间隔（秒）
+_INGEST_INTERVAL = 30
+# 支持的统计时间范围，None 表示全部时间
+STATS_PERIODS: tuple[Optional[timedelta], ...] = (
+    timedelta(days=1),
+    timedelta(days=7),
+    timedelta(days=30),
+    None,
+)
+# 排行榜最多保留的用户数量
+LEADERBOARD_SIZE = 100
+
+
+def _truncate_to_hour(time: datetime) -> datetime:
+    return time.replace(minute=0, second=0, microsecond=0)
+
+
+class _WinsBucket:
+    __slots__ = ("wins_count", "winners")
+
+    def __init__(self) -> None:
+        self.wins_count = 0
+        # 用户 Slug -> 中奖次数
+        self.winners: Counter[str] = Counter()
+
+    def add(self, user_slug: str) -> None:
+        self.wins_count += 1
+        self.winners[user_slug] += 1
+
+    def remove(self, other: "_WinsBucket") -> None:
+        self.wins_count -= other.wins_count
+        for user_slug, count in other.winners.items():
+            remaining = self.winners[user_slug] - count
+            if remaining > 0:
+                self.winners[user_slug] = remaining
+            else:
+                del self.winners[user_slug]
+
+
+class _Ranking:
+    __slots__ = ("leaderboard", "sorted_counts")
+
+    def __init__(self, bucket: _WinsBucket) -> None:
+        self.leaderboard = bucket.winners.most_common(LEADERBOARD_SIZE)
+        self.sorted_counts = sorted(bucket.winners.values())
+
+
+class LotteryWinIndex:
+    def __init__(self) -> None:
+        self._last_id = 0
+        # 小时 -> 奖项名称 -> 统计数据，按时间升序排列，用于滑动更新各时间范围
+        self._hourly_buckets: dict[datetime, dict[str, _WinsBucket]] = {}
+        # 时间范围 -> 奖项名称（None 表示全部奖项）-> 统计数据，随新数据滑动更新
+        self._period_buckets: dict[
+            Optional[timedelta], dict[Optional[str], _WinsBucket]
+        ] = {period: {} for period in STATS_PERIODS}
+        self._period_start_times: dict[Optional[timedelta], Optional[datetime]] = {
+            period: _truncate_to_hour(get_start_time(period)) if period else None
+            for period in STATS_PERIODS
+        }
+        # 排行榜与中奖次数分布，数据变化后按需重新生成
+        self._rankings: dict[tuple[Optional[timedelta], Optional[str]], _Ranking] = {}
+        self._last_ingest_time: float = 0
+        self._lock = Lock()
+
+    def _add(self, time: datetime, user_slug: str, award_name: str) -> None:
+        hour = _truncate_to_hour(time)
+        # 同一用户在多个时间段中奖时共用同一个字符串对象
+        user_slug = intern(user_slug)
+
+        hour_buckets = self._hourly_buckets.setdefault(hour, {})
+        hour_buckets.setdefault(award_name, _WinsBucket()).add(user_slug)
+
+        for period, start_time in self._period_start_times.items():
+            if start_time and hour < start_time:
+                continue
+            period_buckets = self._period_buckets[period]
+            period_buckets.setdefault(award_name, _WinsBucket()).add(user_slug)
+            period_buckets.setdefault(None, _WinsBucket()).add(user_slug)
+
+    def _slide_periods(self) -> None:
+        for period in STATS_PERIODS:
+            if not period:
+                continue
+
+            old_start_time = self._period_start_times[period]
+            new_start_time = _truncate_to_hour(get_start_time(period))
+            self._period_start_times[period] = new_start_time
+
+            # 移除滑出时间范围的数据
+            period_buckets = self._period_buckets[period]
+            for hour, hour_buckets in self._hourly_buckets.items():
+                if hour >= new_start_time:
+                    break
+                if old_start_time and hour < old_start_time:  # 已被移除
+                    continue
+                for award_name, bucket in hour_buckets.items():
+                    period_buckets[award_name].remove(bucket)
+                    period_buckets[None].remove(bucket)
+
+    # 移除已滑出全部时间范围的小时数据
+    def _evict(self) -> None:
+        start_time = min(x for x in self._period_start_times.values() if x)
+        for hour in [x for x in self._hourly_buckets if x < start_time]:
+            del self._hourly_buckets[hour]
+
+    async def _ingest(self) -> None:
+        async with self._lock:
+            if monotonic() - self._last_ingest_time < _INGEST_INTERVAL:
+                return
+
+            async for (
+                id_,
+                time,
+                user_slug,
+                award_name,
+            ) in LotteryWinRecord.iter_after_id(self._last_id):
+                self._add(time, user_slug, award_name)
+                self._last_id = id_
+
+            # 新数据通常按时间顺序写入，仅在出现乱序时重新排序
+            hours = list(self._hourly_buckets)
+            if hours != sorted(hours):
+                self._hourly_buckets = dict(sorted(self._hourly_buckets.items()))
+
+            self._slide_periods()
+            self._evict()
+            self._rankings.clear()
+            self._last_ingest_time = monotonic()
+
+    def _get_ranking(
+        self,
+        period: Optional[timedelta],
+        award_name: Optional[str],
+    ) -> _Ranking:
+        key = (period, award_name)
+        ranking = self._rankings.get(key)
+        if not ranking:
+            bucket = self._period_buckets[period].get(award_name, _WinsBucket())
+            ranking = self._rankings[key] = _Ranking(bucket)
+
+        return ranking
+
+    # 返回各奖项的中奖次数与中奖人数
+    async def get_summary(
+        self, period: Optional[timedelta]
+    ) -> tuple[dict[str, int], dict[str, int]]:
+        await self._ingest()
+
+        period_buckets = self._period_buckets[period]
+        wins_count = dict.fromkeys(REWARD_NAMES, 0)
+        winners_count = dict.fromkeys(REWARD_NAMES, 0)
+        for award_name, bucket in period_buckets.items():
+            if award_name is None:
+                continue
+            wins_count[award_name] = bucket.wins_count
+            winners_count[award_name] = len(bucket.winners)
+
+        return wins_count, winners_count
+
+    # 返回中奖次数最多的用户及其中奖次数
+    async def get_leaderboard(
+        self,
+        period: Optional[timedelta],
+        award_name: Optional[str],
+        limit: int,
+    ) -> list[tuple[str, int]]:
+        await self._ingest()
+
+        return self._get_ranking(period, award_name).leaderboard[:limit]
+
+    # 返回用户的中奖次数、排名与超过的中奖用户比例，未中奖时排名为 None
+    async def get_user_stats(
+        self,
+        user_slug: str,
+        period: Optional[timedelta],
+        award_name: Optional[str],
+    ) -> tuple[int, Optional[int], float, int]:
+        await self._ingest()
+
+        bucket = self._period_buckets[period].get(award_name)
+        wins_count = bucket.winners.get(user_slug, 0) if bucket else 0
+        sorted_counts = self._get_ranking(period, award_name).sorted_counts
+        winners_count = len(sorted_counts)
+        if not wins_count:
+            return 0, None, 0.0, winners_count
+
+        rank = winners_count - bisect_right(sorted_counts, wins_count) + 1
+        percentile = bisect_left(sorted_counts, wins_count) / winners_count
+
+        return wins_count, rank, percentile, winners_count
+
+
+LOTTERY_WIN_INDEX = LotteryWinIndex()
@@ -0,0 +1,126 @@
+from asyncio import Lock
+from datetime import datetime, timedelta
+from typing import Literal, Optional
+
+from sspeedup.time_helper import get_start_time
+
+from models.jianshu.lottery_win_record import REWARD_NAMES, LotteryWinRecord
+
+# 时间段结束后仍可能写入延迟抓取的记录，超过该时间后才视为不再变化
+_CLOSE_DELAY = timedelta(minutes=10)
+# 缓存保留的最大时间范围
+_MAX_RANGE = timedelta(days=60)
+
+_RESOLUTIONS: tuple[Literal["1h", "1d"], ...] = ("1h", "1d")
+
+
+def _truncate(time: datetime, resolution: Literal["1h", "1d"]) -> datetime:
+    if resolution == "1h":
+        return time.replace(minute=0, second=0, microsecond=0)
+
+    return time.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class _WinsHistorySeries:
+    def __init__(self, resolution: Literal["1h", "1d"]) -> None:
+        self._resolution = resolution
+        # 已结束的时间段，时间段 -> 奖项名称 -> 中奖次数，写入后不再变化
+        self._closed_buckets: dict[datetime, dict[str, int]] = {}
+        # 已缓存的时间范围 [start, end)
+        self._covered_start_time: Optional[datetime] = None
+        self._covered_end_time: Optional[datetime] = None
+        self._lock = Lock()
+
+    async def _fetch(
+        self, start_time: datetime, end_time: Optional[datetime]
+    ) -> dict[datetime, dict[str, int]]:
+        result: dict[datetime, dict[str, int]] = {}
+        async for time, award_name, count in LotteryWinRecord.iter_wins_count_by_award(
+            start_time=start_time, end_time=end_time, resolution=self._resolution
+        ):
+            result.setdefault(time, {})[award_name] = count
+
+        return result
+
+    async def _fill_closed_buckets(
+        self, start_time: datetime, closed_end_time: datetime
+    ) -> None:
+        if (
+            self._covered_start_time is None
+            or self._covered_end_time is None
+            # 缓存与所需范围不相连时直接重新获取
+            or closed_end_time < self._covered_start_time
+            or start_time > self._covered_end_time
+        ):
+            self._closed_buckets = await self._fetch(start_time, closed_end_time)
+            self._covered_start_time = start_time
+            self._covered_end_time = closed_end_time
+            return
+
+        if start_time < self._covered_start_time:
+            self._closed_buckets.update(
+                await self._fetch(start_time, self._covered_start_time)
+            )
+            self._closed_buckets = dict(sorted(self._closed_buckets.items()))
+            self._covered_start_time = start_time
+        if closed_end_time > self._covered_end_time:
+            self._closed_buckets.update(
+                await self._fetch(self._covered_end_time, closed_end_time)
+            )
+            self._covered_end_time = closed_end_time
+
+    def _evict(self) -> None:
+        start_time = _truncate(get_start_time(_MAX_RANGE), self._resolution)
+        if self._covered_start_time and self._covered_start_time < start_time:
+            for time in [x for x in self._closed_buckets if x < start_time]:
+                del self._closed_buckets[time]
+            self._covered_start_time = start_time
+
+    async def get(self, td: timedelta) -> dict[datetime, dict[str, int]]:
+        start_time = _truncate(get_start_time(td), self._resolution)
+        # 第一个可能仍在变化的时间段
+        open_start_time = _truncate(get_start_time(_CLOSE_DELAY), self._resolution)
+
+        if start_time >= open_start_time:
+            return await self._fetch(start_time, None)
+
+        async with self._lock:
+            await self._fill_closed_buckets(start_time, open_start_time)
+            self._evict()
+
+            result = {
+                time: value
+                for time, value in self._closed_buckets.items()
+                if time >= start_time
+            }
+
+        # 仅重新查询尚未结束的时间段
+        result.update(await self._fetch(open_start_time, None))
+        return result
+
+
+class LotteryWinsHistoryCache:
+    def __init__(self) -> None:
+        self._series = {
+            resolution: _WinsHistorySeries(resolution) for resolution in _RESOLUTIONS
+        }
+
+    # 返回各时间段的中奖次数，以及各奖项在各时间段的中奖次数
+    async def get_history(
+        self, td: timedelta, resolution: Literal["1h", "1d"]
+    ) -> tuple[dict[datetime, int], dict[str, dict[datetime, int]]]:
+        buckets = await self._series[resolution].get(td)
+
+        history: dict[datetime, int] = {}
+        rewards_history: dict[str, dict[datetime, int]] = {
+            key: {} for key in REWARD_NAMES
+        }
+        for time, value in buckets.items():
+            history[time] = sum(value.values())
+            for award_name, count in value.items():
+                rewards_history.setdefault(award_name, {})[time] = count
+
+        return history, rewards_history
+
+
+LOTTERY_WINS_HISTORY_CACHE = LotteryWinsHistoryCache()
@@ -0,0 +1,117 @@
+from asyncio import Lock, Task, create_task, sleep
+from datetime import date
+from typing import Optional
+
+from models.jianshu.article_earning_ranking_record import ArticleEarningRankingRecord
+from utils.log import logger
+from utils.lp_recommend_rule import get_earliest_can_recommend_date
+
+# 参与计算的最低上榜排名
+_MAXIMUM_RANKING = 85
+# 检查是否有新上榜日期的间隔（秒）
+_CHECK_INTERVAL = 600
+
+
+class LPRecommendEligibilityIndex:
+    def __init__(self) -> None:
+        # 作者 Slug -> 最早可推荐日期，不包含没有符合条件上榜记录的作者
+        self._next_can_recommend_dates: dict[str, date] = {}
+        # 计算时使用的最新上榜日期及该日期的记录数，该日期的数据可能尚未写入完成
+        self._latest_date_and_count: Optional[tuple[date, int]] = None
+        self._started = False
+        self._warm_up_task: Optional[Task[None]] = None
+        self._scheduler: Optional[Task[None]] = None
+        self._lock = Lock()
+
+    @staticmethod
+    async def _build() -> dict[str, date]:
+        result: dict[str, date] = {}
+
+        def add(
+            author_slug: str, records: list[tuple[date, int, Optional[str]]]
+        ) -> None:
+            next_can_recommend_date = get_earliest_can_recommend_date(records)
+            if next_can_recommend_date:
+                result[author_slug] = next_can_recommend_date
+
+        current_author_slug: Optional[str] = None
+        records: list[tuple[date, int, Optional[str]]] = []
+        async for (
+            author_slug,
+            date_,
+            ranking,
+            slug,
+        ) in ArticleEarningRankingRecord.iter_all_ranking_history(
+            maximum_ranking=_MAXIMUM_RANKING
+        ):
+            if author_slug != current_author_slug:
+                if current_author_slug:
+                    add(current_author_slug, records)
+                current_author_slug = author_slug
+                records = []
+            records.append((date_, ranking, slug))
+
+        if current_author_slug:
+            add(current_author_slug, records)
+
+        return result
+
+    async def _update(self) -> None:
+        async with self._lock:
+            # 上榜数据每天更新一次，出现新日期或最新日期的记录数变化时重新计算全部作者
+            latest_date_and_count = (
+                await ArticleEarningRankingRecord.get_latest_date_and_count()
+            )
+            if latest_date_and_count != self._latest_date_and_count:
+                # 计算完成前继续使用旧数据
+                self._next_can_recommend_dates = await self._build()
+                self._latest_date_and_count = latest_date_and_count
+                logger.debug(
+                    "LP 推荐资格计算完成",
+                    latest_date=str(latest_date_and_count[0])
+                    if latest_date_and_count
+                    else None,
+                    authors_count=len(self._next_can_recommend_dates),
+                )
+
+            self._started = True
+
+    async def _schedule(self) -> None:
+        while True:
+            await sleep(_CHECK_INTERVAL)
+            try:
+                await self._update()
+            except Exception as e:  # noqa: BLE001
+                logger.error("计算 LP 推荐资格失败", exception=e)
+
+    async def _ensure_started(self) -> None:
+        # 首次计算完成前需要等待，失败时抛出异常
+        if not self._started:
+            await self._update()
+
+        if not self._scheduler:
+            self._scheduler = create_task(self._schedule())
+
+    async def _warm_up(self) -> None:
+        try:
+            await self._ensure_started()
+        except Exception as e:  # noqa: BLE001
+            logger.error("计算 LP 推荐资格失败", exception=e)
+
+    # 在后台进行首次计算，避免首次查询时等待全表扫描
+    def start(self) -> None:
+        if not self._warm_up_task:
+            self._warm_up_task = create_task(self._warm_up())
+
+    async def get(self, author_slug: str) -> Optional[date]:
+        await self._ensure_started()
+
+        return self._next_can_recommend_dates.get(author_slug)
+
+    async def get_many(self, author_slugs: list[str]) -> dict[str, Optional[date]]:
+        await self._ensure_started()
+
+        return {x: self._next_can_recommend_dates.get(x) for x in author_slugs}
+
+
+LP_RECOMMEND_ELIGIBILITY_INDEX = LPRecommendEligibilityIndex()
@@ -0,0 +1,40 @@
+from collections.abc import Iterable
+from datetime import date, timedelta
+from typing import Optional
+
+
+# records 为作者排名不低于 85 名的上榜记录 (日期, 排名, 文章 Slug)，
+# 按日期与排名降序排列
+def get_earliest_can_recommend_date(
+    records: Iterable[tuple[date, int, Optional[str]]],
+) -> Optional[date]:
+    records = iter(records)
+    latest_onrank_record = next(records, None)
+    if not latest_onrank_record:
+        return None
+
+    latest_date, latest_ranking, latest_slug = latest_onrank_record
+    interval_days = 10 if latest_ranking <= 30 else 7
+    counted_article_slugs = {latest_slug}
+
+    now_date, now_ranking = latest_date, latest_ranking
+    for pervious_date, pervious_ranking, pervious_slug in records:
+        if pervious_slug in counted_article_slugs:
+            now_date, now_ranking = pervious_date, pervious_ranking
+            continue
+
+        counted_article_slugs.add(pervious_slug)
+
+        if (now_ranking <= 30 and (now_date - pervious_date).days + 1 >= 10) or (
+            now_ranking > 30 and (now_date - pervious_date).days + 1 >= 7
+        ):
+            return latest_date + timedelta(days=interval_days)
+
+        if pervious_ranking <= 30:
+            interval_days += 10
+        else:
+            interval_days += 7
+
+        now_date, now_ranking = pervious_date, pervious_ranking
+
+    return latest_date + timedelta(days=interval_days)
@@ -0,0 +1,35 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date, datetime
+from typing import Literal, TypeVar
+
+from msgspec import DecodeError, Struct
+from msgspec.msgpack import decode as msgpack_decode
+from msgspec.msgpack import encode as msgpack_encode
+
+T = TypeVar("T", bound=Struct)
+
+
+class LotteryWinRecordCursor(Struct, frozen=True, array_like=True):
+    time: datetime
+    id: int
+
+
+class ArticleEarningRankingRecordCursor(Struct, frozen=True, array_like=True):
+    # 游标仅在排序方式相同时有效
+    order_by: Literal["date", "ranking"]
+    order_direction: Literal["asc", "desc"]
+    date: date
+    ranking: int
+
+
+def encode_cursor(cursor: Struct) -> str:
+    return urlsafe_b64encode(msgpack_encode(cursor)).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str, type: type[T]) -> T:  # noqa: A002
+    try:
+        return msgpack_decode(
+            urlsafe_b64decode(token + "=" * (-len(token) % 4)), type=type
+        )
+    except (ValueError, DecodeError) as e:
+        raise ValueError("分页游标无效") from e
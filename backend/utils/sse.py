@@ -0,0 +1,4 @@
+from litestar.response import ServerSentEventMessage
+
+# 心跳只发送注释行，不携带 data 字段，避免客户端收到空的 message 事件
+HEARTBEAT_MESSAGE = ServerSentEventMessage(comment="heartbeat", data=None)
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Literal, Union
+
+from litestar import Request, Response
+from litestar.openapi import ResponseSpec
+from msgspec import Struct
+from msgspec.msgpack import encode as msgpack_encode
+from sspeedup.api.litestar import RESPONSE_STRUCT_CONFIG, ResponseStruct, success
+
+SeriesFormat = Literal["map", "columnar"]
+
+_JSON_MEDIA_TYPE = "application/json"
+_MSGPACK_MEDIA_TYPES: tuple[str, ...] = ("application/msgpack", "application/x-msgpack")
+# 数据库中的时间均为不带时区的北京时间，转换为时间戳时不能依赖服务器时区
+_DATA_TIMEZONE = timezone(timedelta(hours=8))
+
+
+class ColumnarSeries(Struct, frozen=True):
+    # Unix 时间戳（秒）
+    t: list[int]
+    v: list[Union[int, float]]
+
+
+class ColumnarHistoryResponse(Struct, **RESPONSE_STRUCT_CONFIG):
+    history: ColumnarSeries
+
+
+def to_columnar(history: dict[datetime, Any]) -> ColumnarSeries:
+    return ColumnarSeries(
+        t=[
+            int(
+                (
+                    item if item.tzinfo else item.replace(tzinfo=_DATA_TIMEZONE)
+                ).timestamp()
+            )
+            for item in history
+        ],
+        v=list(history.values()),
+    )
+
+
+# 将带时区的时间转换为数据库使用的不带时区的北京时间
+def to_data_time(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+
+    return value.astimezone(_DATA_TIMEZONE).replace(tzinfo=None)
+
+
+# 同时声明 map 与 columnar 两种格式的响应结构
+def generate_series_response_spec(
+    map_response: type[Struct], columnar_response: type[Struct]
+) -> ResponseSpec:
+    return ResponseSpec(
+        ResponseStruct[Union[map_response, columnar_response]],  # type: ignore
+        generate_examples=False,
+        description="format 为 columnar 时返回列式时间序列；"
+        "Accept 请求头为 application/msgpack 时使用 MessagePack 编码响应",
+    )
+
+
+def negotiated_success(request: Request, data: Any) -> Response:  # noqa: ANN401
+    media_type = request.accept.best_match(
+        [_JSON_MEDIA_TYPE, *_MSGPACK_MEDIA_TYPES], default=_JSON_MEDIA_TYPE
+    )
+    response = success(data=data)
+    if media_type not in _MSGPACK_MEDIA_TYPES:
+        return response
+
+    return Response(
+        msgpack_encode(response.content),
+        status_code=response.status_code,
+        media_type=media_type,
+    )
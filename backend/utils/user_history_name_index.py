@@ -0,0 +1,83 @@
+from asyncio import Event, Task, create_task, sleep
+from typing import Optional
+
+from models.jianshu.user import User
+from utils.log import logger
+
+# 检查是否有用户信息更新的间隔（秒）
+_REFRESH_INTERVAL = 600
+
+
+class UserHistoryNameIndex:
+    def __init__(self) -> None:
+        # 用户 Slug -> (当前昵称, 曾用昵称)
+        self._user_names: dict[str, tuple[Optional[str], list[str]]] = {}
+        # 昵称（包括当前昵称与曾用昵称）-> 使用过该昵称的用户 Slug
+        self._name_slugs: dict[str, set[str]] = {}
+
+        self._last_update_time = None
+        # 首次构建完成（包括失败）后设置，此后查询只读取内存中的索引
+        self._ready = Event()
+        self._scheduler: Optional[Task[None]] = None
+
+    def _remove(self, slug: str) -> None:
+        name, history_names = self._user_names.pop(slug, (None, []))
+        for item in (name, *history_names):
+            if not item:
+                continue
+            slugs = self._name_slugs.get(item)
+            if slugs:
+                slugs.discard(slug)
+                if not slugs:
+                    del self._name_slugs[item]
+
+    def _add(self, slug: str, name: Optional[str], history_names: list[str]) -> None:
+        self._user_names[slug] = (name, history_names)
+        for item in (name, *history_names):
+            if item:
+                self._name_slugs.setdefault(item, set()).add(slug)
+
+    async def _refresh(self) -> None:
+        # 仅获取上次更新后发生变化的用户，单个用户的更新之间没有 await
+        async for slug, name, history_names, update_time in User.iter_history_names(
+            updated_after=self._last_update_time
+        ):
+            self._remove(slug)
+            self._add(slug, name, history_names)
+            if not self._last_update_time or update_time > self._last_update_time:
+                self._last_update_time = update_time
+
+    async def _schedule(self) -> None:
+        while True:
+            try:
+                await self._refresh()
+            except Exception as e:  # noqa: BLE001
+                logger.error("更新曾用昵称索引失败", exception=e)
+
+            # 首次构建失败时不再阻塞查询，已写入的数据仍然可用
+            self._ready.set()
+            await sleep(_REFRESH_INTERVAL)
+
+    # 在后台构建并定期更新索引，查询时只读取内存
+    def start(self) -> None:
+        if not self._scheduler:
+            self._scheduler = create_task(self._schedule())
+
+    async def _ensure_ready(self) -> None:
+        self.start()
+        await self._ready.wait()
+
+    # 返回当前或曾经使用该昵称的用户 Slug
+    async def get_slugs(self, name: str) -> list[str]:
+        await self._ensure_ready()
+
+        return sorted(self._name_slugs.get(name, ()))
+
+    # 返回用户的当前昵称与曾用昵称，用户没有曾用昵称时返回 None
+    async def get_names(self, slug: str) -> Optional[tuple[Optional[str], list[str]]]:
+        await self._ensure_ready()
+
+        return self._user_names.get(slug)
+
+
+USER_HISTORY_NAME_INDEX = UserHistoryNameIndex()
@@ -0,0 +1,28 @@
+from collections.abc import Iterable
+from typing import Optional
+
+from models.jianshu.user import User
+from utils.cache import LRUCache
+
+# 用户昵称很少变化，在多个请求间共享缓存
+_USER_NAME_CACHE: LRUCache[str, str] = LRUCache(maxsize=10000)
+
+
+# 批量获取用户昵称，结果中不包含数据库中不存在的用户
+async def get_user_names(slugs: Iterable[str]) -> dict[str, Optional[str]]:
+    result: dict[str, Optional[str]] = {}
+    missing_slugs: list[str] = []
+    for slug in set(slugs):
+        name = _USER_NAME_CACHE.get(slug)
+        if name is None:
+            missing_slugs.append(slug)
+        else:
+            result[slug] = name
+
+    if missing_slugs:
+        for slug, name in (await User.get_names_by_slugs(missing_slugs)).items():
+            result[slug] = name
+            if name is not None:
+                _USER_NAME_CACHE.set(slug, name)
+
+    return result
@@ -0,0 +1,209 @@
+from asyncio import Event, Task, create_task, sleep
+from bisect import bisect_left
+from collections import Counter
+from datetime import date
+from heapq import nlargest
+from time import monotonic
+from typing import Optional
+
+from models.jianshu.article_earning_ranking_record import ArticleEarningRankingRecord
+from models.jianshu.user import User
+from utils.cache import LRUCache
+from utils.log import logger
+
+# 检查是否有新上榜记录的间隔（秒）
+_CHECK_INTERVAL = 60
+# 定期全量重建，以反映用户修改昵称
+_REBUILD_INTERVAL = 24 * 3600
+# 单次查询昵称的最大用户数量
+_NAMES_BATCH_SIZE = 1000
+# 单次查询最多返回的结果数量
+MAX_LIMIT = 100
+
+
+class UserNameAutocompleteIndex:
+    def __init__(self) -> None:
+        # 用户 Slug -> 上榜次数 / 昵称
+        self._slug_counts: Counter[str] = Counter()
+        self._slug_names: dict[str, str] = {}
+        # 按昵称升序排列，用于二分查找前缀
+        self._names: list[str] = []
+        self._name_counts: dict[str, int] = {}
+        # 昵称前缀 -> 上榜次数最多的昵称，索引更新后替换为新的缓存
+        self._results: LRUCache[str, list[str]] = LRUCache(maxsize=10000)
+
+        # 已统计的最新上榜日期，该日期的数据可能尚未写入完成，
+        # 每次检查时重新统计并覆盖该日期的上榜次数
+        self._latest_date: Optional[date] = None
+        self._latest_date_counts: Counter[str] = Counter()
+        self._last_rebuild_time: Optional[float] = None
+        # 首次构建完成（包括失败）后设置，此后查询只读取内存中的索引
+        self._ready = Event()
+        self._scheduler: Optional[Task[None]] = None
+
+    @staticmethod
+    async def _get_names(slugs: list[str]) -> dict[str, Optional[str]]:
+        result: dict[str, Optional[str]] = {}
+        for i in range(0, len(slugs), _NAMES_BATCH_SIZE):
+            result.update(
+                await User.get_names_by_slugs(slugs[i : i + _NAMES_BATCH_SIZE])
+            )
+
+        return result
+
+    # 统计 since_date 及之后的上榜记录
+    # 返回 (最新上榜日期, 该日期的上榜次数, 总上榜次数)
+    @staticmethod
+    async def _count_since(
+        since_date: Optional[date],
+    ) -> Optional[tuple[date, Counter[str], Counter[str]]]:
+        daily_counts = [
+            item
+            async for item in ArticleEarningRankingRecord.iter_daily_on_rank_counts(
+                since_date=since_date
+            )
+        ]
+        if not daily_counts:
+            return None
+
+        latest_date = max(on_rank_date for _, on_rank_date, _ in daily_counts)
+        new_counts: Counter[str] = Counter()
+        latest_date_counts: Counter[str] = Counter()
+        for slug, on_rank_date, count in daily_counts:
+            new_counts[slug] += count
+            if on_rank_date == latest_date:
+                latest_date_counts[slug] += count
+
+        return latest_date, latest_date_counts, new_counts
+
+    def _swap(
+        self,
+        slug_counts: Counter[str],
+        slug_names: dict[str, str],
+        latest_date: Optional[date],
+        latest_date_counts: Counter[str],
+    ) -> None:
+        name_counts: Counter[str] = Counter()
+        for slug, name in slug_names.items():
+            name_counts[name] += slug_counts[slug]
+        names = sorted(name_counts)
+
+        # 以下赋值之间没有 await，查询不会读取到新旧混合的索引
+        self._slug_counts = slug_counts
+        self._slug_names = slug_names
+        self._names = names
+        self._name_counts = dict(name_counts)
+        self._results = LRUCache(maxsize=10000)
+        self._latest_date = latest_date
+        self._latest_date_counts = latest_date_counts
+
+    async def _rebuild(self) -> None:
+        latest_date = await ArticleEarningRankingRecord.get_latest_date()
+
+        # 最新上榜日期之前的数据不再变化，直接统计总数
+        slug_counts: Counter[str] = Counter()
+        if latest_date:
+            slug_counts.update(
+                {
+                    slug: count
+                    async for slug, count in (
+                        ArticleEarningRankingRecord.iter_on_rank_counts(
+                            before_date=latest_date
+                        )
+                    )
+                }
+            )
+        latest_date_counts: Counter[str] = Counter()
+        result = await self._count_since(latest_date)
+        if result:
+            latest_date, latest_date_counts, new_counts = result
+            slug_counts.update(new_counts)
+
+        slug_names = {
+            slug: name
+            for slug, name in (await self._get_names(list(slug_counts))).items()
+            if name
+        }
+        self._swap(slug_counts, slug_names, latest_date, latest_date_counts)
+
+    # 重新统计已统计的最新上榜日期及之后的记录
+    async def _update(self) -> None:
+        result = await self._count_since(self._latest_date)
+        if not result:
+            return
+
+        latest_date, latest_date_counts, new_counts = result
+        changed_slugs = [
+            slug
+            for slug in new_counts.keys() | self._latest_date_counts.keys()
+            if new_counts[slug] != self._latest_date_counts[slug]
+        ]
+        if not changed_slugs and latest_date == self._latest_date:
+            return
+
+        # 减去上次统计的最新上榜日期的上榜次数，再加上本次统计结果
+        slug_counts = self._slug_counts.copy()
+        slug_counts.subtract(self._latest_date_counts)
+        slug_counts.update(new_counts)
+
+        slug_names = self._slug_names.copy()
+        for slug, name in (await self._get_names(changed_slugs)).items():
+            if name:
+                slug_names[slug] = name
+            else:
+                slug_names.pop(slug, None)
+
+        self._swap(slug_counts, slug_names, latest_date, latest_date_counts)
+
+    async def _schedule(self) -> None:
+        while True:
+            try:
+                if (
+                    self._last_rebuild_time is None
+                    or monotonic() - self._last_rebuild_time >= _REBUILD_INTERVAL
+                ):
+                    await self._rebuild()
+                    self._last_rebuild_time = monotonic()
+                else:
+                    await self._update()
+            except Exception as e:  # noqa: BLE001
+                logger.error("更新昵称自动补全索引失败", exception=e)
+
+            # 首次构建失败时不再阻塞查询，使用空索引直到下次重试成功
+            self._ready.set()
+            await sleep(_CHECK_INTERVAL)
+
+    # 在后台构建并定期更新索引，查询时只读取内存
+    def start(self) -> None:
+        if not self._scheduler:
+            self._scheduler = create_task(self._schedule())
+
+    async def _ensure_ready(self) -> None:
+        self.start()
+        await self._ready.wait()
+
+    # 返回用户的上榜次数
+    async def get_on_rank_counts(self, slugs: list[str]) -> dict[str, int]:
+        await self._ensure_ready()
+
+        return {slug: self._slug_counts[slug] for slug in slugs}
+
+    # 返回以 prefix 开头且上榜次数最多的昵称
+    async def search(self, prefix: str, limit: int) -> list[str]:
+        await self._ensure_ready()
+
+        result = self._results.get(prefix)
+        if result is None:
+            start = bisect_left(self._names, prefix)
+            # 所有以 prefix 开头的昵称都小于 prefix + 最大字符
+            end = bisect_left(self._names, prefix + "\U0010ffff", lo=start)
+            # 上榜次数相同时按昵称升序排列
+            result = nlargest(
+                MAX_LIMIT, self._names[start:end], key=self._name_counts.__getitem__
+            )
+            self._results.set(prefix, result)
+
+        return result[:limit]
+
+
+USER_NAME_AUTOCOMPLETE_INDEX = UserNameAutocompleteIndex()
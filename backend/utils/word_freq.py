@@ -0,0 +1,56 @@
+from hashlib import sha256
+from typing import Optional
+
+from models.article_word_freq import ArticleWordFreq
+from utils.cache import LRUCache
+from utils.config import CONFIG
+from utils.log import logger
+from utils.word_split import splitter
+
+# 返回的词语数量
+_WORDS_COUNT = 100
+
+# (文章 Slug, 正文摘要) -> 词频
+_WORD_FREQ_CACHE: LRUCache[tuple[str, bytes], dict[str, int]] = LRUCache(maxsize=1000)
+
+
+async def _load(article_slug: str, content_hash: bytes) -> Optional[dict[str, int]]:
+    try:
+        return await ArticleWordFreq.get_word_freq(
+            slug=article_slug, content_hash=content_hash
+        )
+    except Exception as e:  # noqa: BLE001
+        # 读取缓存失败时重新分词
+        logger.warn("读取文章词频缓存失败", exception=e)
+        return None
+
+
+async def _save(
+    article_slug: str, content_hash: bytes, word_freq: dict[str, int]
+) -> None:
+    try:
+        await ArticleWordFreq.upsert(
+            slug=article_slug, content_hash=content_hash, word_freq=word_freq
+        )
+    except Exception as e:  # noqa: BLE001
+        # 写入缓存失败不影响本次结果
+        logger.warn("保存文章词频缓存失败", exception=e)
+
+
+# 依次从进程内缓存、数据库缓存中查找，均未命中时进行分词
+async def get_word_freq(article_slug: str, text: str) -> dict[str, int]:
+    # 不同分词后端的结果不同，计算摘要时包含后端名称
+    content_hash = sha256(f"{CONFIG.word_split.backend}\n{text}".encode()).digest()
+    key = (article_slug, content_hash)
+
+    word_freq = _WORD_FREQ_CACHE.get(key)
+    if word_freq is not None:
+        return word_freq
+
+    word_freq = await _load(article_slug, content_hash)
+    if word_freq is None:
+        word_freq = dict((await splitter.count(text)).most_common(_WORDS_COUNT))
+        await _save(article_slug, content_hash, word_freq)
+
+    _WORD_FREQ_CACHE.set(key, word_freq)
+    return word_freq
@@ -0,0 +1,211 @@
+from asyncio import Lock, gather, get_running_loop, to_thread
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+from multiprocessing import get_context
+from os.path import abspath
+from re import compile as re_compile
+from typing import Any, Optional, Protocol
+
+from sshared.word_split import WordSplitter
+
+from utils.config import CONFIG
+
+# 与远程分词服务保持一致，仅保留由两个及以上汉字组成的词语
+_WORD_REGEX = re_compile(r"[\u4e00-\u9fff]{2,}")
+# 与远程分词服务保持一致，分词前只保留中文字符与标点符号
+_CLEAN_REGEX = re_compile(r"[^\u4e00-\u9fff\u3000-\u303f\n]")
+# 多进程分词时每个文本块的最大字符数
+_CHUNK_CHARS = 4000
+
+# 对词云没有意义的常见词语
+_DEFAULT_STOPWORDS: frozenset[str] = frozenset(
+    """
+    我们 你们 他们 她们 它们 自己 大家 别人 这个 那个 这些 那些 这样 那样 这种 那种
+    这里 那里 这么 那么 什么 怎么 怎样 为什么 因为 所以 但是 而且 并且 如果 虽然 然后
+    还是 或者 以及 而是 不过 只是 于是 因此 已经 可以 可能 应该 需要 没有 不是 就是
+    一个 一些 一样 一直 一下 一种 一次 一点 时候 其实 觉得 知道 非常 比较 还有 之后
+    之前 以后 以前 现在 时间 今天 的话 起来
+    """.split()
+)
+
+
+class WordSplitterProtocol(Protocol):
+    async def split(self, text: str) -> tuple[str, ...]: ...
+
+    async def count(self, text: str) -> Counter[str]: ...
+
+    async def close(self) -> None: ...
+
+
+# 返回当前分词后端不可用的原因，可用时返回 None
+def get_word_split_unavailable_reason() -> Optional[str]:
+    if CONFIG.word_split.backend == "local":
+        return None if find_spec("jieba") else "后端未安装本地分词依赖"
+
+    if not (
+        CONFIG.word_split_access_key.access_key_id
+        and CONFIG.word_split_access_key.access_key_secret
+    ):
+        return "后端未设置分词服务凭据"
+
+    return None
+
+
+class RemoteWordSplitter(WordSplitter):
+    # 分词服务客户端已将长文本拆分为多个文本块并发请求，此处无需再拆分
+    async def count(self, text: str) -> Counter[str]:
+        return Counter(await self.split(text))
+
+    async def close(self) -> None:
+        return
+
+
+def _load_tokenizer(dictionary_cache_path: str) -> Any:  # noqa: ANN401
+    import jieba
+
+    jieba.setLogLevel("WARNING")
+    tokenizer = jieba.Tokenizer()
+    # 首次加载时将词典编译为前缀词典并保存，之后直接读取编译结果
+    tokenizer.cache_file = dictionary_cache_path
+    tokenizer.initialize()
+
+    return tokenizer
+
+
+def _load_stopwords(stopwords_path: Optional[str]) -> frozenset[str]:
+    if not stopwords_path:
+        return _DEFAULT_STOPWORDS
+
+    with open(stopwords_path, encoding="utf-8") as f:
+        return _DEFAULT_STOPWORDS | {line.strip() for line in f if line.strip()}
+
+
+def _split_text(
+    tokenizer: Any,  # noqa: ANN401
+    stopwords: frozenset[str],
+    text: str,
+) -> tuple[str, ...]:
+    text = _CLEAN_REGEX.sub("", text)
+
+    return tuple(
+        word
+        for word in tokenizer.cut(text, HMM=True)
+        if _WORD_REGEX.fullmatch(word) and word not in stopwords
+    )
+
+
+def _split_into_chunks(text: str) -> list[str]:
+    chunks: list[str] = []
+    now_paragraphs: list[str] = []
+    now_chars = 0
+
+    # 在段落边界拆分，避免影响分词效果，超长的单个段落单独作为一个文本块
+    for paragraph in text.split("\n"):
+        if now_paragraphs and now_chars + len(paragraph) > _CHUNK_CHARS:
+            chunks.append("\n".join(now_paragraphs))
+            now_paragraphs = []
+            now_chars = 0
+        now_paragraphs.append(paragraph)
+        now_chars += len(paragraph) + 1
+    chunks.append("\n".join(now_paragraphs))
+
+    return chunks
+
+
+# 进程池中每个进程使用的分词器与停用词
+_process_tokenizer: Any = None
+_process_stopwords: frozenset[str] = _DEFAULT_STOPWORDS
+
+
+def _init_process(dictionary_cache_path: str, stopwords_path: Optional[str]) -> None:
+    global _process_tokenizer, _process_stopwords
+
+    _process_tokenizer = _load_tokenizer(dictionary_cache_path)
+    _process_stopwords = _load_stopwords(stopwords_path)
+
+
+def _count_in_process(text: str) -> Counter[str]:
+    return Counter(_split_text(_process_tokenizer, _process_stopwords, text))
+
+
+class LocalWordSplitter:
+    def __init__(
+        self,
+        dictionary_cache_path: str,
+        stopwords_path: Optional[str] = None,
+        processes: int = 1,
+    ) -> None:
+        self._dictionary_cache_path = abspath(dictionary_cache_path)
+        self._stopwords_path = stopwords_path
+        self._processes = processes
+
+        self._tokenizer: Any = None
+        self._stopwords: frozenset[str] = _DEFAULT_STOPWORDS
+        self._process_pool: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    def _load(self) -> None:
+        self._stopwords = _load_stopwords(self._stopwords_path)
+        self._tokenizer = _load_tokenizer(self._dictionary_cache_path)
+
+    async def _ensure_loaded(self) -> None:
+        if not self._tokenizer:
+            async with self._lock:
+                if not self._tokenizer:
+                    await to_thread(self._load)
+
+    async def split(self, text: str) -> tuple[str, ...]:
+        await self._ensure_loaded()
+
+        # 分词为 CPU 密集型操作，避免阻塞事件循环
+        return await to_thread(_split_text, self._tokenizer, self._stopwords, text)
+
+    async def count(self, text: str) -> Counter[str]:
+        if self._processes <= 1:
+            return Counter(await self.split(text))
+
+        # 长文本在段落边界拆分为多个文本块，在进程池中并行分词，各进程分别加载词典
+        if not self._process_pool:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self._processes,
+                mp_context=get_context("spawn"),
+                initializer=_init_process,
+                initargs=(self._dictionary_cache_path, self._stopwords_path),
+            )
+
+        loop = get_running_loop()
+        counters = await gather(
+            *(
+                loop.run_in_executor(self._process_pool, _count_in_process, chunk)
+                for chunk in _split_into_chunks(text)
+            )
+        )
+
+        # 按文本块顺序合并，出现次数相同的词语保持首次出现的顺序
+        result: Counter[str] = Counter()
+        for counter in counters:
+            result.update(counter)
+        return result
+
+    async def close(self) -> None:
+        if self._process_pool:
+            process_pool, self._process_pool = self._process_pool, None
+            await to_thread(process_pool.shutdown)
+
+
+def create_word_splitter() -> WordSplitterProtocol:
+    if CONFIG.word_split.backend == "local":
+        return LocalWordSplitter(
+            dictionary_cache_path=CONFIG.word_split.local_dictionary_cache_path,
+            stopwords_path=CONFIG.word_split.local_stopwords_path,
+            processes=CONFIG.word_split.local_processes,
+        )
+
+    return RemoteWordSplitter(
+        access_key_id=CONFIG.word_split_access_key.access_key_id,
+        access_key_secret=CONFIG.word_split_access_key.access_key_secret,
+    )
+
+
+splitter = create_word_splitter()
@@ -137,7 +137,8 @@ export function useNameAutocomplete({
 }
 
 export interface GetHistoryNamesOnArticleRankSummaryResponse {
-  historyNamesOnrankSummary: Record<string, number>;
+  historyNames: string[];
+  onRankCount: number;
   userUrl: string;
 }
 export function useHistoryNamesOnArticleRankSummary({
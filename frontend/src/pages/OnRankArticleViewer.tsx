@@ -124,19 +124,17 @@ function HistoryNamesFoundNotice({
   if (!historyNames) return null;
 
   // 无曾用昵称
-  if (!Object.keys(historyNames.historyNamesOnrankSummary).length) return null;
+  if (!historyNames.historyNames.length) return null;
 
   return (
     <Notice className="flex flex-col gap-4" color="info" title="曾用昵称">
-      <Text>找到您曾用昵称的上榜记录：</Text>
+      <Text>
+        找到您的其它昵称，该账号共上榜 {historyNames.onRankCount} 次：
+      </Text>
       <Column gap="gap-2">
-        {Object.entries(historyNames.historyNamesOnrankSummary).map(
-          ([name, dataCount]) => (
-            <Text key={name}>
-              {name}：{dataCount} 条
-            </Text>
-          ),
-        )}
+        {historyNames.historyNames.map((name) => (
+          <Text key={name}>{name}</Text>
+        ))}
       </Column>
 
       <SolidButton onClick={onShowFullData}>查看完整数据</SolidButton>